@@ -20,14 +20,20 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
+import asyncio
 import time
 from datetime import datetime
 from configparser import ConfigParser
-from pyrogram import Client, Message
+from pyrogram import Client
 from pyrogram import __version__
 from pyrogram.raw.all import layer
 from pyrogram.types import Message
 
+from .utils import docs
+from .utils.admins import Admins
+from .utils.recent import Recent
+from .utils.scheduler import Scheduler
+
 
 class Assistant(Client):
     CREATOR_ID = 23122162  # Dan (haskell)
@@ -52,26 +58,37 @@ class Assistant(Client):
             sleep_threshold=180
         )
 
-        self.admins = {
-            chat: {Assistant.CREATOR_ID}
-            for chat in Assistant.chats
-        }
+        self.admins = Admins(Assistant.chats, {Assistant.CREATOR_ID})
+        self.admins_keeper = None
+        self.recent = Recent(Assistant.chats)
+        self.scheduler = Scheduler(f"{name}.scheduled")
 
         self.uptime_reference = time.monotonic_ns()
         self.start_datetime = datetime.utcnow()
+        self.docs_loader = None
 
     async def start(self):
         await super().start()
 
+        # Docs are loaded in background, commands can be served right away
+        self.docs_loader = asyncio.ensure_future(docs.warm_up())
+
+        # Delayed actions left over by the previous run, like unbans of kicked users, are carried out now
+        self.scheduler.start(self)
+
         me = await self.get_me()
         print(f"Assistant for Pyrogram v{__version__} (Layer {layer}) started on @{me.username}. Hi.")
 
-        # Fetch current admins from chats
-        for chat, admins in self.admins.items():
-            async for admin in self.iter_chat_members(chat, filter="administrators"):
-                admins.add(admin.user.id)
+        # Admins are fetched in background as well: chats not fetched yet stay pending, with only the creator as admin.
+        # Chat member updates and a periodic refetch keep them fresh afterwards.
+        self.admins_keeper = asyncio.ensure_future(self.admins.keep_fresh(self))
 
     async def stop(self, *args):
+        if self.admins_keeper:
+            self.admins_keeper.cancel()
+
+        self.scheduler.stop()
+
         await super().stop()
         print("Pyrogram Assistant stopped. Bye.")
 
@@ -79,4 +96,4 @@ class Assistant(Client):
         user_id = message.from_user.id
         chat_id = message.chat.id
 
-        return user_id in self.admins[chat_id]
+        return self.admins.check(chat_id, user_id)
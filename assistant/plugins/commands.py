@@ -30,25 +30,66 @@ from pyrogram import filters, emoji
 from pyrogram.types import CallbackQuery, ChatPermissions, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
 from ..assistant import Assistant
-from ..utils import docs
+from ..utils import docs, memory
+from ..utils.deletions import Deletions
+from ..utils.outbox import Outbox
+from ..utils.purge import purge
+from ..utils.scheduler import Scheduler
 
 command = partial(filters.command, prefixes=list("#!"))
 
+OUTBOX = Outbox()
+
+# Command messages and notices are deleted a few at a time, by chat
+DELETIONS = Deletions(window=0.005)
+
+NOTICE_TTL = 5  # Seconds moderation notices stay before being deleted
+
+
+def queue_reply(message: Message, priority: int, text: str, **kwargs) -> asyncio.Future:
+    """Reply in the chat of the message through the outbox. Returns the future of the message sent."""
+    return OUTBOX.submit(message.chat.id, priority, message.reply, text, **kwargs)
+
+
+def notice(bot: Assistant, message: Message, text: str, **kwargs) -> asyncio.Future:
+    """Reply with a moderation notice through the outbox, deleted NOTICE_TTL seconds after it's sent."""
+    def sent(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is None:
+            delete_later(bot, future.result())
+
+    future = queue_reply(message, Outbox.MODERATION, text, **kwargs)
+    future.add_done_callback(sent)
+
+    return future
+
+
+def delete_later(bot: Assistant, message: Message, delay: float = NOTICE_TTL):
+    """Delete the message after a while, even if the assistant restarts meanwhile."""
+    bot.scheduler.schedule(delay, "delete", message.chat.id, message.message_id)
+
+
+@Scheduler.action("delete")
+async def delete_scheduled(bot: Assistant, chat_id: int, message_id: int):
+    """Delete a message when due, along with the other deletions of its chat"""
+    await DELETIONS.delete_id(bot, chat_id, message_id)
+
 
 async def reply_and_delete(message: Message, text: str):
-    await asyncio.gather(
-        message.delete(),
-        message.reply(
-            text,
-            quote=False,
-            reply_to_message_id=getattr(
-                message.reply_to_message,
-                "message_id", None
-            ),
-            disable_web_page_preview=True
-        )
+    queue_reply(
+        message,
+        Outbox.REPLY,
+        text,
+        quote=False,
+        reply_to_message_id=getattr(
+            message.reply_to_message,
+            "message_id", None
+        ),
+        disable_web_page_preview=True
     )
 
+    # Not waited for, so that admins_only deleting the same command right after shares the same call
+    DELETIONS.delete(message)
+
 
 def admins_only(func):
     @wraps(func)
@@ -56,7 +97,7 @@ def admins_only(func):
         if bot.is_admin(message):
             await func(bot, message)
 
-        await message.delete()
+        await DELETIONS.delete(message)
 
     decorator.admin = True
 
@@ -316,19 +357,21 @@ RTFD = "You seem to be lost...\n\nGo read the **fscking docs**: https://docs.pyr
 @admins_only
 async def rtfd(_, message: Message):
     """Tell to RTFD (rude)"""
-    await asyncio.gather(
-        message.delete(),
-        message.reply_photo(
-            "https://i.imgur.com/a08Ju2e.png",
-            quote=False,
-            caption=RTFD,
-            reply_to_message_id=getattr(
-                message.reply_to_message,
-                "message_id", None
-            )
+    OUTBOX.submit(
+        message.chat.id,
+        Outbox.REPLY,
+        message.reply_photo,
+        "https://i.imgur.com/a08Ju2e.png",
+        quote=False,
+        caption=RTFD,
+        reply_to_message_id=getattr(
+            message.reply_to_message,
+            "message_id", None
         )
     )
 
+    DELETIONS.delete(message)
+
 
 ################################
 
@@ -343,20 +386,21 @@ FMT = (
 @admins_only
 async def fmt(_, message: Message):
     """Tell to format code"""
-    await asyncio.gather(
-        message.delete(),
-        message.reply(
-            FMT,
-            quote=False,
-            parse_mode="html",
-            disable_web_page_preview=True,
-            reply_to_message_id=getattr(
-                message.reply_to_message,
-                "message_id", None
-            ),
-        )
+    queue_reply(
+        message,
+        Outbox.REPLY,
+        FMT,
+        quote=False,
+        parse_mode="html",
+        disable_web_page_preview=True,
+        reply_to_message_id=getattr(
+            message.reply_to_message,
+            "message_id", None
+        ),
     )
 
+    DELETIONS.delete(message)
+
 
 ################################
 
@@ -377,6 +421,9 @@ async def dev(_, message: Message):
 ################################
 
 MESSAGE_DATE_DIFF = 43200  # 12h
+PURGE_MAX = 5000  # Messages deleted at most at once
+PURGE_SCAN = 20000  # Message ids scanned at most while looking for them
+PURGE_PROGRESS_EVERY = 2  # Seconds between progress reports
 
 
 @Assistant.on_message(command("delete"))
@@ -390,43 +437,79 @@ async def delete(bot: Assistant, message: Message):
 
     # Don't delete admins messages
     if bot.is_admin(reply):
-        m = await message.reply("Sorry, I don't delete administrators' messages.")
-        await asyncio.sleep(5)
-        await m.delete()
+        notice(bot, message, "Sorry, I don't delete administrators' messages.")
         return
 
     # Don't delete messages that are too old
     if message.date - reply.date > MESSAGE_DATE_DIFF:
-        m = await message.reply("Sorry, I don't delete messages that are too old.")
-        await asyncio.sleep(5)
-        await m.delete()
+        notice(bot, message, "Sorry, I don't delete messages that are too old.")
         return
 
     cmd = message.command
 
     # No args, delete the mentioned message alone
     if len(cmd) == 1:
-        await reply.delete()
+        await DELETIONS.delete(reply)
         return
 
-    # Delete the last N messages of the mentioned user, up to 200
+    # Delete the last N messages of the mentioned user, as seen by the bot if it saw all of them.
+    # Otherwise, walk back through the history.
+    limit = max(int(cmd[1]), 1)
+    limit = min(limit, PURGE_MAX)
+    mention = reply.from_user.mention
+    since = message.date - MESSAGE_DATE_DIFF
+
+    message_ids, complete = bot.recent.find(message.chat.id, reply.from_user.id, reply.message_id, limit, since)
+
+    if complete:
+        try:
+            await asyncio.gather(*(DELETIONS.delete_id(bot, message.chat.id, i) for i in message_ids))
+            deleted = len(message_ids)
+        except Exception as e:
+            notice(bot, message, f"__Couldn't delete the messages of {mention}__\n\n`{e}`", quote=False)
+            return
 
-    arg = int(cmd[1])
+        bot.recent.forget(message.chat.id, reply.from_user.id, message_ids)
 
-    # Min 1 max 200
-    arg = max(arg, 1)
-    arg = min(arg, 200)
+        notice(bot, message, f"__Deleted {deleted} messages of {mention}__", quote=False)
+        return
 
-    last_200 = range(reply.message_id, reply.message_id - 200, -1)
+    status = await queue_reply(
+        message, Outbox.MODERATION, f"__Deleting {limit} messages of {mention}...__", quote=False
+    )
+    reported = time.monotonic()
+    edit = None
+
+    # Best effort: edits go through the outbox without holding up the deletions, and failures only get logged there
+    async def progress(deleted: int, scanned: int):
+        nonlocal reported, edit
+
+        if time.monotonic() - reported >= PURGE_PROGRESS_EVERY and (edit is None or edit.done()):
+            reported = time.monotonic()
+            edit = OUTBOX.submit(
+                message.chat.id, Outbox.MODERATION, status.edit_text,
+                f"__Deleting {limit} messages of {mention}: {deleted} deleted, {scanned} scanned__"
+            )
 
-    message_ids = [
-        m.message_id for m in filter(
-            lambda m: m.from_user and m.from_user.id == reply.from_user.id,
-            await bot.get_messages(message.chat.id, last_200, replies=0)
+    try:
+        deleted, scanned = await purge(
+            bot, message.chat.id, reply.message_id, reply.from_user.id,
+            limit=limit,
+            since=since,
+            scan=PURGE_SCAN,
+            progress=progress
         )
-    ]
+    except Exception as e:
+        text = f"__Couldn't delete the messages of {mention}__\n\n`{e}`"
+    else:
+        text = f"__Deleted {deleted} messages of {mention} ({scanned} scanned)__"
 
-    await bot.delete_messages(message.chat.id, message_ids[:arg])
+    # Queued after any progress edit, so it's the last one shown. The status goes away in any case, even if it can't
+    # be edited.
+    try:
+        await OUTBOX.submit(message.chat.id, Outbox.MODERATION, status.edit_text, text)
+    finally:
+        delete_later(bot, status)
 
 
 ################################
@@ -442,14 +525,14 @@ async def ban(bot: Assistant, message: Message):
 
     # Don't ban admins
     if bot.is_admin(reply):
-        m = await message.reply("Sorry, I don't ban administrators")
-        await asyncio.sleep(5)
-        await m.delete()
+        notice(bot, message, "Sorry, I don't ban administrators")
         return
 
     await bot.restrict_chat_member(message.chat.id, reply.from_user.id, ChatPermissions())
 
-    await message.reply(
+    queue_reply(
+        message,
+        Outbox.MODERATION,
         f"__Banned {reply.from_user.mention} indefinitely__",
         quote=False,
         reply_markup=InlineKeyboardMarkup([[
@@ -460,6 +543,9 @@ async def ban(bot: Assistant, message: Message):
 
 ################################
 
+KICK_UNBAN_DELAY = 5  # Seconds between a kick and the unban letting the user rejoin
+
+
 @Assistant.on_message(command("kick"))
 @admins_only
 async def kick(bot: Assistant, message: Message):
@@ -471,22 +557,23 @@ async def kick(bot: Assistant, message: Message):
 
     # Don't kick admins
     if bot.is_admin(reply):
-        m = await message.reply("Sorry, I don't kick administrators")
-        await asyncio.sleep(5)
-        await m.delete()
+        notice(bot, message, "Sorry, I don't kick administrators")
         return
 
     # Default ban until_time 60 seconds later as failsafe in case unban doesn't work
     # (can happen in case the server processes unban before ban and thus ignoring unban)
     await bot.kick_chat_member(message.chat.id, reply.from_user.id, int(time.time()) + 60)
 
-    await message.reply(
+    queue_reply(
+        message,
+        Outbox.MODERATION,
         f"__Kicked {reply.from_user.mention}. They can rejoin__",
         quote=False
     )
 
-    await asyncio.sleep(5)  # Sleep to allow the server some time to process the kick
-    await bot.unban_chat_member(message.chat.id, reply.from_user.id)
+    # Unban a few seconds later to allow the server some time to process the kick. The unban is scheduled rather than
+    # waited for, and is still carried out if the assistant restarts in between.
+    bot.scheduler.schedule(KICK_UNBAN_DELAY, "unban_chat_member", message.chat.id, reply.from_user.id)
 
 
 ################################
@@ -504,7 +591,9 @@ async def nab(bot: Assistant, message: Message):
     if target.id in [bot.CREATOR_ID, bot.ASSISTANT_ID]:
         target = message.from_user
 
-    await message.reply(
+    queue_reply(
+        message,
+        Outbox.MODERATION,
         f"__Banned {target.mention} indefinitely__",
         quote=False
     )
@@ -557,6 +646,94 @@ async def unlock(bot: Assistant, message: Message):
     await reply_and_delete(message, UNLOCKED)
 
 
+################################
+
+@Assistant.on_message(command("mem"))
+@admins_only
+async def mem(bot: Assistant, message: Message):
+    """Show memory usage"""
+    articles = docs.article.cache_info()
+
+    if docs.DOCS is None:
+        loaded = "__Docs still warming up__"
+    elif docs.RSS_AFTER is None:
+        # Warm up failed and the docs came from a #reload later on, there's no measure of them
+        loaded = "__Docs loaded by #reload, not measured__"
+    else:
+        loaded = (
+            f"`Before docs`: **{memory.mib(docs.RSS_BEFORE)}**\n"
+            f"`After docs`: **{memory.mib(docs.RSS_AFTER)}**"
+        )
+
+    caches = "".join(f"`{name}`: **{cache.info()}**\n" for name, cache in docs.CACHES.items())
+
+    await reply_and_delete(
+        message,
+        f"**Memory**\n\n"
+        f"{loaded}\n"
+        f"`Now`: **{memory.mib(memory.rss())}**\n\n"
+        f"`Articles`: **{articles.currsize}/{articles.maxsize}** "
+        f"({articles.hits} hits, {articles.misses} misses)\n"
+        f"{caches}"
+        f"`Outbox`: **{OUTBOX.pending()}** queued, {OUTBOX.sent} sent, {OUTBOX.floods} flood waits\n"
+        f"`Deletions`: **{DELETIONS.requests}** in {DELETIONS.calls} calls\n"
+        f"`Scheduler`: **{bot.scheduler.pending()}** pending, {bot.scheduler.done} done, "
+        f"{bot.scheduler.failures} failed"
+    )
+
+
+@Assistant.on_message(command("admins"))
+@admins_only
+async def admins(bot: Assistant, message: Message):
+    """Show the admins cache"""
+    chats = []
+
+    for chat_id in bot.admins:
+        age = bot.admins.age(chat_id)
+        fetched = "pending" if age is None else f"fetched {age / 60:.0f} min ago"
+        chats.append(f"`{chat_id}`: **{len(bot.admins.admins[chat_id])}** admins, {fetched}")
+
+    await reply_and_delete(
+        message,
+        f"**Admins**\n\n"
+        + "\n".join(chats) + "\n\n"
+        f"`Checks`: **{bot.admins.hits}** admins, **{bot.admins.misses}** others\n"
+        f"`Updates`: **{bot.admins.updates}**\n"
+        f"`Fetches`: **{bot.admins.fetches}** ({bot.admins.failures} failed, "
+        f"{len(bot.admins.pending())} chats pending)"
+    )
+
+
+# Only one reload at a time
+RELOADING = asyncio.Lock()
+
+
+@Assistant.on_message(command("reload"))
+@admins_only
+async def reload(_, message: Message):
+    """Reload the docs of the installed Pyrogram"""
+    if RELOADING.locked():
+        await reply_and_delete(message, "__Docs already reloading__")
+        return
+
+    async with RELOADING:
+        start = time.time()
+
+        try:
+            d = await docs.reload()
+        except Exception as e:
+            await reply_and_delete(message, f"**Docs not reloaded**\n\n`{e}`")
+            return
+
+    await reply_and_delete(
+        message,
+        f"**Docs reloaded**\n\n"
+        f"`Pyrogram`: **v{d.version}**\n"
+        f"`Layer`: **{d.layer}**\n"
+        f"`Time`: **{time.time() - start:.1f} s**"
+    )
+
+
 ################################
 
 EVIL = (
@@ -618,7 +795,7 @@ async def cb_query(bot: Assistant, query: CallbackQuery):
         )
         if query.from_user.id == user_id or bot.is_admin(dummy):
             await query.answer()
-            await query.message.delete()
+            await DELETIONS.delete(query.message)
         else:
             await query.answer("Only Admins can remove the help messages.")
 
@@ -663,7 +840,7 @@ async def up(bot: Assistant, message: Message):
                 f"microsecond {num2words(bot.start_datetime.microsecond)}, Coordinated Universal Time`"
             )
         else:
-            await message.delete()
+            await DELETIONS.delete(message)
 
 
 ################################
@@ -672,21 +849,22 @@ async def up(bot: Assistant, message: Message):
 @Assistant.on_message(command("help"))
 async def help(bot: Assistant, message: Message):
     """Show this message"""
-    await asyncio.gather(
-        message.delete(),
-        message.reply(
-            HELP,
-            quote=False,
-            reply_to_message_id=getattr(
-                message.reply_to_message,
-                "message_id", None
-            ),
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("Remove Help", f"remove.{message.from_user.id}")
-            ]]),
-        )
+    queue_reply(
+        message,
+        Outbox.REPLY,
+        HELP,
+        quote=False,
+        reply_to_message_id=getattr(
+            message.reply_to_message,
+            "message_id", None
+        ),
+        reply_markup=InlineKeyboardMarkup([[
+            InlineKeyboardButton("Remove Help", f"remove.{message.from_user.id}")
+        ]]),
     )
 
+    await DELETIONS.delete(message)
+
 
 ################################
 
@@ -20,27 +20,224 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
-from pyrogram import emoji, __version__
+import re
+
+from pyrogram import emoji
 from pyrogram.types import (InlineQuery, InlineQueryResultArticle, InlineQueryResultPhoto, InputTextMessageContent,
                             InlineKeyboardButton, InlineKeyboardMarkup)
 
 from ..assistant import Assistant
 from ..utils import docs
+from ..utils.answers import Answer
+from ..utils.cache import TTLCache
+from ..utils.coalesce import Coalescer
 
 NEXT_OFFSET = 25
+SEARCH_RESULTS = 50
 CACHE_TIME = 5
 
+# Listings always answer the same pages, these are prepared once for the docs they list
+PAGES = TTLCache(maxsize=512, ttl=float("inf"))
+docs.CACHES["Pages"] = PAGES
+
+# Answers to the most recent searches, by query and offset
+ANSWERS = TTLCache(maxsize=1024, ttl=300)
+docs.CACHES["Answers"] = ANSWERS
+
+# Full rankings of the most recent searches, to serve their next pages from
+RANKINGS = TTLCache(maxsize=256, ttl=300)
+docs.CACHES["Rankings"] = RANKINGS
+
+# Constructor IDs as they appear in tracebacks, e.g. "!r 0x520c3870"
+CONSTRUCTOR = re.compile(r"!r 0x([0-9a-f]{1,8})")
+
+# Raw methods returning a type, e.g. "!rr updates"
+RETURNS = "!rr "
+
+# Queries about the docs of another Pyrogram version, e.g. "v1.2 send_message"
+VERSIONED = re.compile(r"v(\d+(?:\.\d+)*) (.+)")
+
+# Queries sent while typing are superseded by the next keystroke, only the last one of a burst gets answered
+TYPING = Coalescer(window=0.3)
+
 FIRE_THUMB = "https://i.imgur.com/qhYYqZa.png"
 ROCKET_THUMB = "https://i.imgur.com/PDaYHd8.png"
 OPEN_BOOK_THUMB = "https://i.imgur.com/v1XSJ1D.png"
 SCROLL_THUMB = "https://i.imgur.com/L1u0VlX.png"
 
-VERSION = __version__.split("-")[0]
+TL_SCHEMA = "https://github.com/pyrogram/pyrogram/blob/develop/compiler/api/source/main_api.tl"
+
+
+class Listing:
+    """A fixed listing answered to an exact query: a header on the first page, followed by pages of results.
+
+    Listings of docs categories take their results from the Docs attribute named by category, everything else lists
+    the given static results.
+    """
+
+    def __init__(self, switch_pm_text: str, header, category: str = None, results: list = ()):
+        self.switch_pm_text = switch_pm_text
+        self.header = header
+        self.category = category
+        self.results = results
+
+    def page(self, d: docs.Docs, offset: int) -> dict:
+        if self.category:
+            entries = getattr(d, self.category)
+            switch_pm_text = f"{self.switch_pm_text} ({len(entries)})"
+            results = [i.result for i in entries[offset: offset + NEXT_OFFSET]]
+        else:
+            switch_pm_text = self.switch_pm_text
+            results = list(self.results[offset: offset + NEXT_OFFSET])
+
+        if offset == 0:
+            results.insert(0, self.header(d))
+
+        if results:
+            return dict(
+                results=results,
+                cache_time=CACHE_TIME,
+                switch_pm_text=switch_pm_text,
+                switch_pm_parameter="start",
+                next_offset=str(offset + NEXT_OFFSET),
+                is_gallery=False
+            )
+
+        return dict(
+            results=[],
+            cache_time=CACHE_TIME,
+            switch_pm_text=switch_pm_text,
+            switch_pm_parameter="start",
+            next_offset="",
+        )
+
+
+def docs_header(title: str, description: str, text: str, url: str, schema: bool = False):
+    """Header of a docs category listing. Its text can refer to the {version} and {layer} of the docs listed."""
+    buttons = [InlineKeyboardButton(f"{emoji.OPEN_BOOK} Online docs", url=url)]
+
+    if schema:
+        buttons.append(InlineKeyboardButton(f"{emoji.SCROLL} TL Schema", url=TL_SCHEMA))
+
+    def header(d: docs.Docs) -> InlineQueryResultArticle:
+        return InlineQueryResultArticle(
+            title=title,
+            description=description,
+            input_message_content=InputTextMessageContent(
+                f"{emoji.FIRE} **Pyrogram {title}**\n\n"
+                f"`{text.format(version=d.version.split('-')[0], layer=d.layer)}`"
+            ),
+            reply_markup=InlineKeyboardMarkup([buttons]),
+            thumb_url=FIRE_THUMB,
+        )
+
+    return header
+
+
+LISTINGS = {
+    "!m": Listing(
+        f"{emoji.CLOSED_BOOK} Pyrogram Methods",
+        docs_header(
+            "Methods",
+            "Pyrogram Methods online documentation page",
+            "This page contains all available high-level Methods existing in Pyrogram v{version}.",
+            "https://docs.pyrogram.org/api/methods",
+        ),
+        category="methods",
+    ),
+    "!t": Listing(
+        f"{emoji.GREEN_BOOK} Pyrogram Types",
+        docs_header(
+            "Types",
+            "Pyrogram Types online documentation page",
+            "This page contains all available high-level Types existing in Pyrogram v{version}.",
+            "https://docs.pyrogram.org/api/types",
+        ),
+        category="types",
+    ),
+    "!b": Listing(
+        f"{emoji.CLOSED_BOOK} Pyrogram Bound Methods",
+        docs_header(
+            "Bound Methods",
+            "Pyrogram Bound Methods online documentation page",
+            "This page contains all available bound methods existing in Pyrogram v{version}.",
+            "https://docs.pyrogram.org/api/bound-methods",
+        ),
+        category="bound_methods",
+    ),
+    "!d": Listing(
+        f"{emoji.CLOSED_BOOK} Pyrogram Decorators",
+        docs_header(
+            "Decorators",
+            "Pyrogram Decorators online documentation page",
+            "This page contains all available decorators existing in Pyrogram v{version}.",
+            "https://docs.pyrogram.org/api/decorators",
+        ),
+        category="decorators",
+    ),
+    "!f": Listing(
+        f"{emoji.CONTROL_KNOBS} Pyrogram Filters",
+        docs_header(
+            "Filters",
+            "Pyrogram Filters online documentation page",
+            "This page contains all library-defined Filters available in Pyrogram v{version}.",
+            "https://docs.pyrogram.org/api/filters",
+        ),
+        category="filters",
+    ),
+    "!rm": Listing(
+        f"{emoji.BLUE_BOOK} Raw Methods",
+        docs_header(
+            "Raw Methods",
+            "Pyrogram Raw Methods online documentation page",
+            "This page contains all available Raw Methods existing in the Telegram Schema, Layer {layer}.",
+            "https://docs.pyrogram.org/telegram/functions",
+            schema=True,
+        ),
+        category="raw_methods",
+    ),
+    "!rt": Listing(
+        f"{emoji.ORANGE_BOOK} Raw Types",
+        docs_header(
+            "Raw Types",
+            "Pyrogram Raw Types online documentation page",
+            "This page contains all available Raw Types existing in the Telegram Schema, Layer {layer}.",
+            "https://docs.pyrogram.org/telegram/types",
+            schema=True,
+        ),
+        category="raw_types",
+    ),
+    "rules": Listing(
+        f"{emoji.SCROLL} Chat Rules",
+        lambda d: InlineQueryResultArticle(
+            title="Chat Rules",
+            description="These are the rules for the Pyrogram Inn and the chats for other languages.",
+            input_message_content=InputTextMessageContent(docs.rules),
+            thumb_url=FIRE_THUMB,
+        ),
+        results=docs.RULES,
+    ),
+    "colin": Listing(
+        f"{emoji.SHARK} Hidden Shark",
+        lambda d: InlineQueryResultPhoto(
+            photo_url="https://i.imgur.com/f32hngs.jpg",
+            # thumb_url="https://i.imgur.com/f32hngs.jpg",
+            title="You found the secret Sharkception :O",
+            description="You might not get anything from it, but you can feel proud to have found me!",
+            caption=f"Hey, I found @ColinShark {emoji.SHARK}",
+            # input_message_content=InputTextMessageContent(f"Hey, I found @ColinShark {emoji.SHARK}"),
+        ),
+    ),
+}
 
 
 @Assistant.on_inline_query()
-async def inline(_, query: InlineQuery):
-    string = query.query.lower()
+async def inline(bot: Assistant, query: InlineQuery):
+    await TYPING.submit(query.from_user.id, answer_inline, bot, query)
+
+
+async def answer_inline(bot: Assistant, query: InlineQuery):
+    string = " ".join(query.query.lower().split())
 
     if string == "":
         await query.answer(
@@ -52,291 +249,156 @@ async def inline(_, query: InlineQuery):
 
         return
 
-    results = []
+    d = docs.DOCS
+
+    if d is None:
+        await query.answer(
+            results=[],
+            cache_time=0,
+            switch_pm_text=f"{emoji.HOURGLASS_NOT_DONE} Warming up, try again in a moment",
+            switch_pm_parameter="start",
+        )
+
+        return
+
     offset = int(query.offset or 0)
-    switch_pm_text = f"{emoji.OPEN_BOOK} Pyrogram Docs"
+    key = (string, offset)
+    cache = PAGES if string in LISTINGS else ANSWERS
+    answer = cache.get(key)
 
-    if string == "!m":
-        switch_pm_text = f"{emoji.CLOSED_BOOK} Pyrogram Methods ({len(docs.METHODS)})"
+    if answer is None:
+        answer = cache[key] = await Answer.prepare(**respond(d, string, offset))
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Methods",
-                    description="Pyrogram Methods online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Methods**\n\n"
-                        f"`This page contains all available high-level Methods existing in Pyrogram v{VERSION}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/api/methods"
-                        )
-                    ]]),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+    await answer.send(bot, query.id)
 
-        for i in docs.METHODS[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "!t":
-        switch_pm_text = f"{emoji.GREEN_BOOK} Pyrogram Types ({len(docs.TYPES)})"
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Types",
-                    description="Pyrogram Types online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Types**\n\n"
-                        f"`This page contains all available high-level Types existing in Pyrogram v{VERSION}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/api/types"
-                        )
-                    ]]),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+def respond(d: docs.Docs, string: str, offset: int) -> dict:
+    """Answer to an inline query, as keyword arguments of InlineQuery.answer."""
+    versioned = VERSIONED.fullmatch(string)
 
-        for i in docs.TYPES[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "!b":
-        switch_pm_text = f"{emoji.CLOSED_BOOK} Pyrogram Bound Methods ({len(docs.BOUND_METHODS)})"
+    if versioned:
+        version, string = versioned.groups()
+        d = docs.release(version)
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Types",
-                    description="Pyrogram Bound Methods online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Bound Methods**\n\n"
-                        f"`This page contains all available bound methods existing in Pyrogram v{VERSION}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/api/bound-methods"
-                        )]]
-                    ),
-                    thumb_url=FIRE_THUMB,
-                )
+        if d is None:
+            return dict(
+                results=[],
+                cache_time=CACHE_TIME,
+                switch_pm_text=f"{emoji.CROSS_MARK} No docs for Pyrogram v{version}",
+                switch_pm_parameter="okay",
             )
 
-        for i in docs.BOUND_METHODS[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "!d":
-        switch_pm_text = f"{emoji.CLOSED_BOOK} Pyrogram Decorators ({len(docs.DECORATORS)})"
+    listing = LISTINGS.get(string)
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Decorators",
-                    description="Pyrogram Decorators online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Decorators**\n\n"
-                        f"`This page contains all available decorators existing in Pyrogram v{VERSION}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/api/decorators"
-                        )]]
-                    ),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+    if listing is not None:
+        return listing.page(d, offset)
 
-        for i in docs.DECORATORS[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "!f":
-        switch_pm_text = f"{emoji.CONTROL_KNOBS} Pyrogram Filters ({len(docs.FILTERS)})"
+    constructor = CONSTRUCTOR.fullmatch(string)
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Filters",
-                    description="Pyrogram Filters online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Filters**\n\n"
-                        f"`This page contains all library-defined Filters available in Pyrogram v{VERSION}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/api/filters"
-                        )
-                    ]]),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+    if constructor:
+        return identify(d, int(constructor.group(1), 16), offset)
 
-        for i in docs.FILTERS[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "!rm":
-        switch_pm_text = f"{emoji.BLUE_BOOK} Raw Methods ({len(docs.RAW_METHODS)})"
+    if string.startswith(RETURNS):
+        return returning(d, string[len(RETURNS):], offset)
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Raw Methods",
-                    description="Pyrogram Raw Methods online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Raw Methods**\n\n"
-                        f"`This page contains all available Raw Methods existing in the Telegram Schema, Layer `"
-                        f"`{docs.layer}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/telegram/functions"
-                        ),
-                        InlineKeyboardButton(
-                            f"{emoji.SCROLL} TL Schema",
-                            url="https://github.com/pyrogram/pyrogram/blob/develop/compiler/api/source/main_api.tl"
-                        ),
-                    ]]),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+    return search(d, string, offset)
 
-        for i in docs.RAW_METHODS[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "!rt":
-        switch_pm_text = f"{emoji.ORANGE_BOOK} Raw Types ({len(docs.RAW_TYPES)})"
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Raw Types",
-                    description="Pyrogram Raw Types online documentation page",
-                    input_message_content=InputTextMessageContent(
-                        f"{emoji.FIRE} **Pyrogram Raw Types**\n\n"
-                        f"`This page contains all available Raw Types existing in the Telegram Schema, Layer "
-                        f"{docs.layer}.`"
-                    ),
-                    reply_markup=InlineKeyboardMarkup([[
-                        InlineKeyboardButton(
-                            f"{emoji.OPEN_BOOK} Online docs",
-                            url="https://docs.pyrogram.org/telegram/types"
-                        ),
-                        InlineKeyboardButton(
-                            f"{emoji.SCROLL} TL Schema",
-                            url="https://github.com/pyrogram/pyrogram/blob/develop/compiler/api/source/main_api.tl",
-                        ),
-                    ]]),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+def identify(d: docs.Docs, constructor_id: int, offset: int) -> dict:
+    """Answer with the raw method or type having the given constructor ID."""
+    entry = d.constructors.get(constructor_id)
 
-        for i in docs.RAW_TYPES[offset: offset + NEXT_OFFSET]:
-            results.append(i[1])
-    elif string == "rules":
-        switch_pm_text = f"{emoji.SCROLL} Chat Rules"
+    if offset:
+        return dict(results=[], cache_time=CACHE_TIME, next_offset="")
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultArticle(
-                    title="Chat Rules",
-                    description="These are the rules for the Pyrogram Inn and the chats for other languages.",
-                    input_message_content=InputTextMessageContent(docs.rules),
-                    thumb_url=FIRE_THUMB,
-                )
-            )
+    if entry is None:
+        return dict(
+            results=[],
+            cache_time=CACHE_TIME,
+            switch_pm_text=f"{emoji.CROSS_MARK} No constructor with ID {hex(constructor_id)}",
+            switch_pm_parameter="okay",
+        )
 
-        for i in docs.RULES[offset: offset + NEXT_OFFSET]:
-            results.append(i)
-    elif string == "colin":
-        switch_pm_text = f"{emoji.SHARK} Hidden Shark"
+    return dict(
+        results=[entry.result],
+        cache_time=CACHE_TIME,
+        switch_pm_text=f"{emoji.OPEN_BOOK} {entry.name} ({hex(constructor_id)})",
+        switch_pm_parameter="start",
+    )
 
-        if offset == 0:
-            results.append(
-                InlineQueryResultPhoto(
-                    photo_url="https://i.imgur.com/f32hngs.jpg",
-                    # thumb_url="https://i.imgur.com/f32hngs.jpg",
-                    title="You found the secret Sharkception :O",
-                    description="You might not get anything from it, but you can feel proud to have found me!",
-                    caption=f"Hey, I found @ColinShark {emoji.SHARK}",
-                    # input_message_content=InputTextMessageContent(f"Hey, I found @ColinShark {emoji.SHARK}"),
-                )
-            )
+
+def returning(d: docs.Docs, name: str, offset: int) -> dict:
+    """Answer with the raw methods returning the given type."""
+    methods = d.returns.get(name, [])
+    results = [i.result for i in methods[offset: offset + SEARCH_RESULTS]]
 
     if results:
-        await query.answer(
+        next_offset = offset + SEARCH_RESULTS
+
+        return dict(
             results=results,
             cache_time=CACHE_TIME,
-            switch_pm_text=switch_pm_text,
+            switch_pm_text=f"{emoji.BLUE_BOOK} {len(methods)} Raw Methods returning \"{name}\"",
             switch_pm_parameter="start",
-            next_offset=str(offset + NEXT_OFFSET),
-            is_gallery=False
+            next_offset=str(next_offset) if next_offset < len(methods) else ""
         )
-    else:
-        if offset:
-            await query.answer(
-                results=[],
-                cache_time=CACHE_TIME,
-                switch_pm_text=switch_pm_text,
-                switch_pm_parameter="start",
-                next_offset="",
-            )
 
-        if string.startswith("!r"):
-            string = " ".join(string.split(" ")[1:])
+    if offset:
+        return dict(results=[], cache_time=CACHE_TIME, next_offset="")
 
-            if string == "":
-                await query.answer(
-                    results=[],
-                    cache_time=CACHE_TIME,
-                    switch_pm_text=f"{emoji.MAGNIFYING_GLASS_TILTED_RIGHT} Type to search Raw Docs",
-                    switch_pm_parameter="start",
-                )
+    return dict(
+        results=[],
+        cache_time=CACHE_TIME,
+        switch_pm_text=f'{emoji.CROSS_MARK} No Raw Methods returning "{name}"',
+        switch_pm_parameter="okay",
+    )
 
-            for i in docs.RAW_METHODS:
-                if string in i[0].lower():
-                    results.append(i[1])
 
-            for i in docs.RAW_TYPES:
-                if string in i[0].lower():
-                    results.append(i[1])
+def search(d: docs.Docs, string: str, offset: int) -> dict:
+    """Answer to a free-text search, paged through its cached ranking."""
+    raw = string.startswith("!r")
+    terms = " ".join(string.split(" ")[1:]) if raw else string
 
-        else:
-            for i in docs.METHODS:
-                if string in i[0].lower():
-                    results.append(i[1])
+    if terms == "":
+        return dict(
+            results=[],
+            cache_time=CACHE_TIME,
+            switch_pm_text=f"{emoji.MAGNIFYING_GLASS_TILTED_RIGHT} Type to search Raw Docs",
+            switch_pm_parameter="start",
+        )
 
-            for i in docs.TYPES:
-                if string in i[0].lower():
-                    results.append(i[1])
+    key = (d.version, string)
+    ranking = RANKINGS.get(key)
 
-            for i in docs.BOUND_METHODS:
-                if string in i[0].lower():
-                    results.append(i[1])
+    if ranking is None:
+        index, raw_index = d.indexes()
+        ranking = RANKINGS[key] = (raw_index if raw else index).search(terms)[1]
 
-            for i in docs.DECORATORS:
-                if string in i[0].lower():
-                    results.append(i[1])
+    results = [i.result for i in ranking[offset: offset + SEARCH_RESULTS]]
 
-            for i in docs.FILTERS:
-                if string in i[0].lower():
-                    results.append(i[1])
+    if results:
+        count = len(ranking)
+        switch_pm_text = f"{emoji.OPEN_BOOK} {count} Result{'s' if count > 1 else ''} for \"{terms}\""
+        next_offset = offset + SEARCH_RESULTS
 
-        if results:
-            count = len(results)
-            switch_pm_text = f"{emoji.OPEN_BOOK} {count} Result{'s' if count > 1 else ''} for \"{string}\""
+        return dict(
+            results=results,
+            cache_time=CACHE_TIME,
+            switch_pm_text=switch_pm_text,
+            switch_pm_parameter="start",
+            next_offset=str(next_offset) if next_offset < count else ""
+        )
 
-            await query.answer(
-                results=results[:50],
-                cache_time=CACHE_TIME,
-                switch_pm_text=switch_pm_text,
-                switch_pm_parameter="start"
-            )
-        else:
-            await query.answer(
-                results=[],
-                cache_time=CACHE_TIME,
-                switch_pm_text=f'{emoji.CROSS_MARK} No results for "{string}"',
-                switch_pm_parameter="okay",
-            )
+    if offset:
+        return dict(
+            results=[],
+            cache_time=CACHE_TIME,
+            next_offset="",
+        )
+
+    return dict(
+        results=[],
+        cache_time=CACHE_TIME,
+        switch_pm_text=f'{emoji.CROSS_MARK} No results for "{terms}"',
+        switch_pm_parameter="okay",
+    )
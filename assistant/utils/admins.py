@@ -0,0 +1,179 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+import logging
+import time
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from pyrogram.raw.types import (UpdateChannelParticipant, UpdateChatParticipantAdmin, ChannelParticipantAdmin,
+                                ChannelParticipantCreator)
+from pyrogram.utils import get_channel_id
+
+log = logging.getLogger(__name__)
+
+
+class Admins:
+    """Admins of the chats the assistant moderates, by chat.
+
+    Sets are filled from the API in background at start, a few chats at a time: until then a chat is pending and only
+    the owners count as its admins. Sets are then updated in place by chat member updates as soon as someone gets
+    promoted or demoted, and fetched again from the API once they're older than the TTL, in case any update went
+    missed. Checks are a set lookup and never reach the API.
+    """
+
+    TTL = 3600  # Seconds after which the admins of a chat are fetched again
+    CHECK_EVERY = 60  # Seconds between checks for chats to fetch again
+    FETCHING = 4  # Chats fetched at once
+    RETRIES = 3  # Fetch attempts per chat when flood waits get in the way
+
+    def __init__(self, chats: list, owners: set):
+        self.owners = set(owners)
+        self.admins = {chat: set(self.owners) for chat in chats}
+        self.fetched = {chat: None for chat in chats}  # Monotonic time of the last fetch, None until fetched
+        self.fetching = {}  # Chat id -> user id -> is admin, of the updates seen while its admins are being fetched
+
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+        self.fetches = 0
+        self.failures = 0
+
+    def __iter__(self):
+        return iter(self.admins)
+
+    def check(self, chat_id: int, user_id: int) -> bool:
+        """Whether the user is an admin of the chat, as far as the latest update or fetch tells."""
+        admins = self.admins.get(chat_id)
+
+        if admins is not None and user_id in admins:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        return False
+
+    def set(self, chat_id: int, user_id: int, is_admin: bool):
+        admins = self.admins.get(chat_id)
+
+        if admins is None or user_id in self.owners:
+            return
+
+        if is_admin:
+            admins.add(user_id)
+        else:
+            admins.discard(user_id)
+
+        if chat_id in self.fetching:
+            self.fetching[chat_id][user_id] = is_admin
+
+        self.updates += 1
+
+    def update(self, update) -> bool:
+        """Apply a raw chat member update. Returns whether it was about admins at all."""
+        if isinstance(update, UpdateChannelParticipant):
+            is_admin = isinstance(update.new_participant, (ChannelParticipantAdmin, ChannelParticipantCreator))
+            self.set(get_channel_id(update.channel_id), update.user_id, is_admin)
+        elif isinstance(update, UpdateChatParticipantAdmin):
+            self.set(-update.chat_id, update.user_id, update.is_admin)
+        else:
+            return False
+
+        return True
+
+    async def fetch(self, client: Client, chat_id: int):
+        """Fetch the admins of a chat from the API, in place of the ones known so far.
+
+        Updates coming while the members are fetched are newer than some of the pages, they're applied again on top.
+        """
+        admins = set(self.owners)
+        updated = self.fetching[chat_id] = {}
+
+        try:
+            async for admin in client.iter_chat_members(chat_id, filter="administrators"):
+                admins.add(admin.user.id)
+        finally:
+            del self.fetching[chat_id]
+
+        for user_id, is_admin in updated.items():
+            if is_admin:
+                admins.add(user_id)
+            else:
+                admins.discard(user_id)
+
+        self.admins[chat_id] = admins
+        self.fetched[chat_id] = time.monotonic()
+        self.fetches += 1
+
+    async def fetch_all(self, client: Client, chats: list):
+        """Fetch the admins of the given chats concurrently, but no more than a few at a time."""
+        semaphore = asyncio.Semaphore(Admins.FETCHING)
+
+        await asyncio.gather(*(self.fetch_retrying(client, chat_id, semaphore) for chat_id in chats))
+
+    async def fetch_retrying(self, client: Client, chat_id: int, semaphore: asyncio.Semaphore):
+        for attempt in range(1, Admins.RETRIES + 1):
+            try:
+                async with semaphore:
+                    await self.fetch(client, chat_id)
+            except FloodWait as e:
+                log.warning("Admins of %s: flood wait of %s s (attempt %s)", chat_id, e.x, attempt)
+
+                # No point in waiting after the last attempt
+                if attempt == Admins.RETRIES:
+                    break
+
+                # Waiting doesn't hold a slot, other chats keep being fetched meanwhile
+                await asyncio.sleep(e.x)
+            except Exception as e:
+                self.failures += 1
+                log.warning("Admins of %s not fetched: %s", chat_id, e)
+                return
+            else:
+                return
+
+        self.failures += 1
+
+    async def keep_fresh(self, client: Client):
+        """Fetch the admins of the chats still pending or older than the TTL, forever."""
+        while True:
+            await self.fetch_all(client, self.stale())
+            await asyncio.sleep(Admins.CHECK_EVERY)
+
+    def stale(self) -> list:
+        now = time.monotonic()
+
+        return [
+            chat_id for chat_id, fetched in self.fetched.items()
+            if fetched is None or now - fetched >= Admins.TTL
+        ]
+
+    def pending(self) -> list:
+        """Chats whose admins were never fetched yet."""
+        return [chat_id for chat_id, fetched in self.fetched.items() if fetched is None]
+
+    def age(self, chat_id: int):
+        """Seconds since the admins of a chat were last fetched, None if never."""
+        fetched = self.fetched[chat_id]
+
+        return None if fetched is None else time.monotonic() - fetched
@@ -0,0 +1,92 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from typing import List
+
+from pyrogram import Client, raw
+from pyrogram.raw.core import TLObject
+from pyrogram.types import InlineQueryResult
+
+
+class Serialized(TLObject):
+    """Raw TL object serialized once, written as is every time after."""
+
+    __slots__ = ["data"]
+
+    QUALNAME = "Serialized"
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def write(self) -> bytes:
+        return self.data
+
+
+class Answer:
+    """Inline query answer whose results are already converted to raw TL and serialized.
+
+    Converting results is what InlineQuery.answer spends most of its time on (markdown parsing included), prepared
+    answers skip all of it and can be sent to any number of queries.
+    """
+
+    __slots__ = ["results", "cache_time", "is_gallery", "next_offset", "switch_pm"]
+
+    def __init__(self, results: list, cache_time: int, is_gallery: bool, next_offset: str, switch_pm):
+        self.results = results
+        self.cache_time = cache_time
+        self.is_gallery = is_gallery
+        self.next_offset = next_offset
+        self.switch_pm = switch_pm
+
+    @classmethod
+    async def prepare(
+        cls,
+        results: List[InlineQueryResult],
+        cache_time: int = 300,
+        is_gallery: bool = False,
+        next_offset: str = "",
+        switch_pm_text: str = "",
+        switch_pm_parameter: str = ""
+    ) -> "Answer":
+        """Prepare an answer out of the same arguments InlineQuery.answer takes."""
+        return cls(
+            results=[Serialized((await r.write()).write()) for r in results],
+            cache_time=cache_time,
+            is_gallery=is_gallery,
+            next_offset=next_offset,
+            switch_pm=raw.types.InlineBotSwitchPM(
+                text=switch_pm_text,
+                start_param=switch_pm_parameter
+            ) if switch_pm_text else None
+        )
+
+    async def send(self, client: Client, inline_query_id: str) -> bool:
+        return await client.send(
+            raw.functions.messages.SetInlineBotResults(
+                query_id=int(inline_query_id),
+                results=self.results,
+                cache_time=self.cache_time,
+                gallery=self.is_gallery or None,
+                next_offset=self.next_offset or None,
+                switch_pm=self.switch_pm
+            )
+        )
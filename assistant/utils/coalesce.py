@@ -0,0 +1,72 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class Coalescer:
+    """Runs calls by key, dropping those superseded by a newer call with the same key within a short window.
+
+    A call coming after a quiet window runs right away. A call coming within the window of the previous one is only run
+    once the window has passed, in a task of its own, and is cancelled in case yet another call comes meanwhile.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.recent = OrderedDict()  # key -> (time of the last call, its delayed task or None), oldest first
+
+    async def submit(self, key, func, *args):
+        now = time.monotonic()
+
+        # Forget keys that have been quiet for a whole window
+        while self.recent:
+            seen, _ = next(iter(self.recent.values()))
+
+            if now - seen < self.window:
+                break
+
+            self.recent.popitem(last=False)
+
+        last = self.recent.pop(key, None)
+
+        if last is None:
+            self.recent[key] = (now, None)
+            await func(*args)
+            return
+
+        if last[1] is not None:
+            last[1].cancel()
+
+        self.recent[key] = (now, asyncio.ensure_future(self.later(func, *args)))
+
+    async def later(self, func, *args):
+        await asyncio.sleep(self.window)
+
+        try:
+            await func(*args)
+        except Exception:
+            log.exception("Coalesced call failed")
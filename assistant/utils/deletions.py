@@ -0,0 +1,89 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+import logging
+
+from pyrogram.types import Message
+
+from .futures import fail
+
+log = logging.getLogger(__name__)
+
+BATCH = 100  # Message ids deleted at once, the most a single call takes
+
+
+class Deletions:
+    """Message deletions, gathered by chat over a short window and sent as a single delete_messages call.
+
+    Each deletion gets a future of its outcome, resolved once the call including it is done. Failures are logged, so
+    the future needn't be awaited. The same message asked to be deleted twice within the window is only sent once.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.pending = {}  # Chat id -> (message id, future) of the deletions waiting for the window to end
+
+        self.requests = 0
+        self.calls = 0
+
+    def delete(self, message: Message) -> asyncio.Future:
+        """Delete a message, using the client it came from, along with the others of its chat."""
+        return self.delete_id(message._client, message.chat.id, message.message_id)
+
+    def delete_id(self, client, chat_id: int, message_id: int) -> asyncio.Future:
+        """Delete a message known by id only, along with the others of its chat."""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        batch = self.pending.get(chat_id)
+
+        if batch is None:
+            batch = self.pending[chat_id] = []
+            loop.call_later(self.window, lambda: asyncio.ensure_future(self.flush(client, chat_id)))
+
+        batch.append((message_id, future))
+        self.requests += 1
+
+        return future
+
+    async def flush(self, client, chat_id: int):
+        batch = self.pending.pop(chat_id)
+        message_ids = list(dict.fromkeys(message_id for message_id, _ in batch))
+
+        for i in range(0, len(message_ids), BATCH):
+            part = set(message_ids[i: i + BATCH])
+            futures = [f for message_id, f in batch if message_id in part]
+            self.calls += 1
+
+            try:
+                result = await client.delete_messages(chat_id, message_ids[i: i + BATCH])
+            except Exception as e:
+                log.warning("Messages in %s not deleted: %s", chat_id, e)
+
+                # Waiters may have been cancelled while the call was going on
+                for f in futures:
+                    if not f.done():
+                        fail(f, e)
+            else:
+                for f in futures:
+                    if not f.done():
+                        f.set_result(result)
@@ -20,22 +20,39 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
+import asyncio
+import logging
 import re
+import sys
+from functools import lru_cache
 
-from pyrogram import filters, emoji, types
+from pyrogram import filters, emoji, types, __version__
 from pyrogram.types import (InlineQueryResultArticle, InputTextMessageContent, InlineKeyboardMarkup,
                             InlineKeyboardButton, Object)
 from pyrogram.raw import types as raw_types, functions as raw_methods
 from pyrogram.raw.all import layer
 from pyrogram import Client
 
+from . import memory, snapshot
+from .index import Index
+
+log = logging.getLogger(__name__)
+
+ARTICLES = 512
+SNAPSHOTS = "snapshots"
+
+# Search indexes of other versions kept mapped at once
+INDEXES = 4
+
+# Type a raw function returns, as stated in its docstring: either a TL type or a plain ``bool``
+RETURNS = re.compile(r"Returns:\s+(?:List of )?(?::obj:`(?P<type>[\w.]+) <|``(?P<bool>bool)``)")
+
 
 class Result:
     DESCRIPTION_MAX_LEN = 60
 
     @staticmethod
-    def get_description(item):
-        full = item.__doc__.split("\n")[0]
+    def get_description(full: str):
         short = full[: Result.DESCRIPTION_MAX_LEN].strip()
 
         if len(short) >= Result.DESCRIPTION_MAX_LEN - 1:
@@ -52,15 +69,15 @@ class Result:
         DOCS = "https://docs.pyrogram.org/api/methods/{}"
         THUMB = "https://i.imgur.com/S5lY8fy.png"
 
-        def __new__(cls, item):
-            short, full = Result.get_description(item)
+        def __new__(cls, entry):
+            short, full = Result.get_description(entry.doc)
 
             return InlineQueryResultArticle(
-                title=f"{item.__name__}",
+                title=f"{entry.title}",
                 description="Method - " + short,
                 input_message_content=InputTextMessageContent(
                     f"{emoji.CLOSED_BOOK} **Pyrogram Docs**\n\n"
-                    f"[{item.__name__}]({cls.DOCS.format(item.__name__)}) - Method\n\n"
+                    f"[{entry.title}]({cls.DOCS.format(entry.title)}) - Method\n\n"
                     f"`{full}`\n",
                     disable_web_page_preview=True,
                 ),
@@ -71,15 +88,15 @@ class Result:
         DOCS = "https://docs.pyrogram.org/api/decorators#pyrogram.Client.{}"
         THUMB = "https://i.imgur.com/xp3jld1.png"
 
-        def __new__(cls, item):
-            short, full = Result.get_description(item)
+        def __new__(cls, entry):
+            short, full = Result.get_description(entry.doc)
 
             return InlineQueryResultArticle(
-                title=f"{item.__name__}",
+                title=f"{entry.title}",
                 description="Decorator - " + short,
                 input_message_content=InputTextMessageContent(
                     f"{emoji.ARTIST_PALETTE} **Pyrogram Docs**\n\n"
-                    f"[{item.__name__}]({cls.DOCS.format(item.__name__)}) - Decorator\n\n"
+                    f"[{entry.title}]({cls.DOCS.format(entry.title)}) - Decorator\n\n"
                     f"`{full}`\n",
                     disable_web_page_preview=True,
                 ),
@@ -90,15 +107,15 @@ class Result:
         DOCS = "https://docs.pyrogram.org/api/types/{}"
         THUMB = "https://i.imgur.com/dw1lLBX.png"
 
-        def __new__(cls, item):
-            short, full = Result.get_description(item)
+        def __new__(cls, entry):
+            short, full = Result.get_description(entry.doc)
 
             return InlineQueryResultArticle(
-                title=f"{item.__name__}",
+                title=f"{entry.title}",
                 description="Type - " + short,
                 input_message_content=InputTextMessageContent(
                     f"{emoji.GREEN_BOOK} **Pyrogram Docs**\n\n"
-                    f"[{item.__name__}]({cls.DOCS.format(item.__name__)}) - Type\n\n"
+                    f"[{entry.title}]({cls.DOCS.format(entry.title)}) - Type\n\n"
                     f"`{full}`",
                     disable_web_page_preview=True,
                 ),
@@ -109,13 +126,13 @@ class Result:
         DOCS = "https://docs.pyrogram.org/api/filters#pyrogram.filters.{}"
         THUMB = "https://i.imgur.com/YRe6cKU.png"
 
-        def __new__(cls, item):
+        def __new__(cls, entry):
             return InlineQueryResultArticle(
-                title=f"{item.__class__.__name__}",
-                description=f"Filter - {item.__class__.__name__}",
+                title=f"{entry.title}",
+                description=f"Filter - {entry.title}",
                 input_message_content=InputTextMessageContent(
                     f"{emoji.CONTROL_KNOBS} **Pyrogram Docs**\n\n"
-                    f"[{item.__class__.__name__}]({cls.DOCS.format(item.__class__.__name__.lower())}) - Filter",
+                    f"[{entry.title}]({cls.DOCS.format(entry.title.lower())}) - Filter",
                     disable_web_page_preview=True,
                 ),
                 thumb_url=cls.THUMB,
@@ -125,15 +142,15 @@ class Result:
         DOCS = "https://docs.pyrogram.org/api/bound-methods/{}.{}"
         THUMB = "https://i.imgur.com/GxFuuks.png"
 
-        def __new__(cls, item):
-            a, b = item.__qualname__.split(".")
+        def __new__(cls, entry):
+            a, b = entry.title.split(".")
 
             return InlineQueryResultArticle(
-                title=f"{item.__qualname__}",
+                title=f"{entry.title}",
                 description=f'Bound Method "{b}" of {a}',
                 input_message_content=InputTextMessageContent(
                     f"{emoji.LEDGER} **Pyrogram Docs**\n\n"
-                    f"[{item.__qualname__}]({cls.DOCS.format(a, b)}) - Bound Method",
+                    f"[{entry.title}]({cls.DOCS.format(a, b)}) - Bound Method",
                     disable_web_page_preview=True,
                 ),
                 thumb_url=cls.THUMB,
@@ -143,18 +160,18 @@ class Result:
         DOCS = "https://docs.pyrogram.org/telegram/functions/{}"
         THUMB = "https://i.imgur.com/NY4uasQ.png"
 
-        def __new__(cls, item):
-            constructor_id = hex(item[1].ID)
-            path = cls.DOCS.format(Result.snek(item[0]).replace("_", "-").replace(".-", "/"))
+        def __new__(cls, entry):
+            constructor_id = hex(entry.id)
+            path = cls.DOCS.format(Result.snek(entry.title).replace("_", "-").replace(".-", "/"))
 
             return InlineQueryResultArticle(
-                title=f"{item[0]}",
-                description=f"Raw Method - {constructor_id}\nSchema: Layer {layer}",
+                title=f"{entry.title}",
+                description=f"Raw Method - {constructor_id}\nSchema: Layer {entry.layer}",
                 input_message_content=InputTextMessageContent(
                     f"{emoji.BLUE_BOOK} **Pyrogram Docs**\n\n"
-                    f"[{item[0]}]({path}) - Raw Method\n\n"
+                    f"[{entry.title}]({path}) - Raw Method\n\n"
                     f"`ID`: **{constructor_id}**\n"
-                    f"`Schema`: **Layer {layer}**",
+                    f"`Schema`: **Layer {entry.layer}**",
                     disable_web_page_preview=True,
                 ),
                 thumb_url=cls.THUMB,
@@ -164,109 +181,467 @@ class Result:
         DOCS = "https://docs.pyrogram.org/telegram/types/{}"
         THUMB = "https://i.imgur.com/b33rM21.png"
 
-        def __new__(cls, item):
-            constructor_id = hex(item[1].ID)
-            path = cls.DOCS.format(Result.snek(item[0]).replace("_", "-").replace(".-", "/"))
+        def __new__(cls, entry):
+            constructor_id = hex(entry.id)
+            path = cls.DOCS.format(Result.snek(entry.title).replace("_", "-").replace(".-", "/"))
 
             return InlineQueryResultArticle(
-                title=f"{item[0]}",
-                description=f"Raw Type - {constructor_id}\nSchema: Layer {layer}",
+                title=f"{entry.title}",
+                description=f"Raw Type - {constructor_id}\nSchema: Layer {entry.layer}",
                 input_message_content=InputTextMessageContent(
                     f"{emoji.ORANGE_BOOK} **Pyrogram Docs**\n\n"
-                    f"[{item[0]}]({path}) - Raw Type\n\n"
+                    f"[{entry.title}]({path}) - Raw Type\n\n"
                     f"`ID`: **{constructor_id}**\n"
-                    f"`Schema`: **Layer {layer}**",
+                    f"`Schema`: **Layer {entry.layer}**",
                     disable_web_page_preview=True,
                 ),
                 thumb_url=cls.THUMB,
             )
 
 
-METHODS = []
+class Entry:
+    """Compact docs entry, holding just the strings needed to build its inline result when asked for.
+
+    Raw entries also hold the schema layer they belong to, any other entry is the same across layers.
+    """
+
+    __slots__ = ("kind", "name", "title", "doc", "id", "layer")
+
+    def __init__(self, kind, name: str, title: str = None, doc: str = None, id: int = 0, layer: int = 0):
+        self.kind = kind
+        self.name = sys.intern(name)
+        self.title = self.name if title is None else sys.intern(title)
+        self.doc = doc and sys.intern(doc.split("\n")[0])
+        self.id = id
+        self.layer = layer
+
+    def state(self) -> tuple:
+        return self.name, None if self.title is self.name else self.title, self.doc, self.id
+
+    @property
+    def result(self) -> InlineQueryResultArticle:
+        return article(self)
+
+
+@lru_cache(maxsize=ARTICLES)
+def article(entry: Entry) -> InlineQueryResultArticle:
+    """Build the inline result of an entry. Only the most recently used ones are kept around."""
+    return entry.kind(entry)
+
+
+class Docs:
+    """Docs entries of a Pyrogram version by category, and their inline search indexes."""
+
+    # Categories and the kind of results their entries are shown as
+    CATEGORIES = {
+        "methods": Result.Method,
+        "decorators": Result.Decorator,
+        "types": Result.Type,
+        "filters": Result.Filter,
+        "bound_methods": Result.BoundMethod,
+        "raw_methods": Result.RawMethod,
+        "raw_types": Result.RawType
+    }
+
+    def __init__(self, version: str, layer: int):
+        self.version = version
+        self.layer = layer
+
+        self.methods = []
+        self.decorators = []
+        self.types = []
+        self.filters = []
+        self.bound_methods = []
+        self.raw_methods = []
+        self.raw_types = []
+
+        self.index = Index()
+        self.raw_index = Index()
+        self.source = None
+
+        # Raw entries by constructor ID and raw methods by the lowercase name of the type they return
+        self.constructors = {}
+        self.returns = {}
+
+    def identify(self):
+        """Map raw entries by constructor ID, for IDs seen in tracebacks to be looked up as they are."""
+        self.constructors = {i.id: i for i in self.raw_methods + self.raw_types}
 
-for a in dir(Client):
-    m = getattr(Client, a)
+    def state(self) -> tuple:
+        """Plain data the docs can be snapshotted as, along with the flat postings of the indexes."""
+        entries = {}
+        positions = {}
+
+        for c in Docs.CATEGORIES:
+            entries[c] = []
+
+            for i in getattr(self, c):
+                positions[i] = len(positions)
+                entries[c].append(i.state())
+
+        index, flats = self.index.state()
+        raw_index, raw_flats = self.raw_index.state()
+
+        index["entries"] = [positions[i] for i in self.index.entries]
+        raw_index["entries"] = [positions[i] for i in self.raw_index.entries]
+
+        offset = positions[self.raw_methods[0]] if self.raw_methods else 0
+        returns = {t: [positions[i] - offset for i in methods] for t, methods in self.returns.items()}
+
+        return (
+            {"entries": entries, "index": index, "raw_index": raw_index, "returns": returns},
+            flats + raw_flats
+        )
+
+    @classmethod
+    def restore(
+        cls, version: str, layer: int, state: dict, flats: list, records: dict = None, source: str = None
+    ) -> "Docs":
+        """Docs back from their snapshot state.
+
+        Entries found in records, by kind and state, are shared instead of being created again, and new ones are
+        added to it. This way docs of many versions only take memory for what changed between them.
+
+        Docs restored from a source snapshot leave their indexes out, to be mapped again only when searched.
+        """
+        d = cls(version, layer)
+        records = {} if records is None else records
+
+        for c, kind in Docs.CATEGORIES.items():
+            entry_layer = layer if kind in RAW else 0
+            category = []
+
+            for i in state["entries"][c]:
+                key = (kind, entry_layer, *i)
+                entry = records.get(key)
+
+                if entry is None:
+                    entry = records[key] = Entry(kind, *i, layer=entry_layer)
+
+                category.append(entry)
+
+            setattr(d, c, category)
+
+        if source is None:
+            d.index, d.raw_index = d.map(state, flats)
+        else:
+            d.index = d.raw_index = None
+            d.source = source
+
+        d.returns = {t: [d.raw_methods[i] for i in methods] for t, methods in state["returns"].items()}
+        d.identify()
+
+        return d
+
+    def map(self, state: dict, flats: list) -> tuple:
+        """Search indexes of these docs, restored from their snapshot state."""
+        entries = [i for c in Docs.CATEGORIES for i in getattr(self, c)]
+        index, raw_index = state["index"], state["raw_index"]
+
+        return (
+            Index.restore([entries[i] for i in index["entries"]], index, flats[:3]),
+            Index.restore([entries[i] for i in raw_index["entries"]], raw_index, flats[3:])
+        )
+
+    def indexes(self) -> tuple:
+        """Search indexes, the Pyrogram API one and the Raw API one."""
+        if self.index is None:
+            return remap(self)
+
+        return self.index, self.raw_index
+
+    def records(self) -> dict:
+        """Entries of these docs by kind and state, for docs of other versions to share them."""
+        return {
+            (i.kind, i.layer, *i.state()): i
+            for c in Docs.CATEGORIES
+            for i in getattr(self, c)
+        }
+
+
+# Kinds of the raw entries, those depend on the schema layer
+RAW = (Result.RawMethod, Result.RawType)
+
+
+def resolve(root, name: str):
+    for part in name.split("."):
+        root = getattr(root, part)
+
+    return root
+
+
+def build() -> Docs:
+    """Introspect the installed Pyrogram and index everything found."""
+    d = Docs(__version__, layer)
+
+    for a in dir(Client):
+        m = getattr(Client, a)
+
+        try:
+            if not a.startswith("_") and a[0].islower() and m.__doc__ and not a.startswith("on_"):
+                d.methods.append(Entry(Result.Method, a.lower(), m.__name__, m.__doc__))
+        except AttributeError:
+            pass
+
+    for a in dir(Client):
+        m = getattr(Client, a)
+
+        try:
+            if not a.startswith("_") and a[0].islower() and m.__doc__ and a.startswith("on_"):
+                d.decorators.append(Entry(Result.Decorator, a.lower(), m.__name__, m.__doc__))
+        except AttributeError:
+            pass
+
+    for a in dir(types):
+        t = getattr(types, a)
+
+        if not a.startswith("_") and a[0].isupper() and t.__doc__:
+            d.types.append(Entry(Result.Type, a, t.__name__, t.__doc__))
+
+    d.filters = [
+        Entry(Result.Filter, i.lower(), getattr(filters, i).__class__.__name__)
+        for i in filter(
+            lambda x: not x.startswith("_")
+                      and x[0].islower(),
+            dir(filters)
+        )
+    ]
+
+    for a in dir(types):
+        try:
+            c = getattr(types, a)
+            if issubclass(c, Object):
+                for m in dir(c):
+                    if (
+                        not m.startswith("_")
+                        and callable(getattr(c, m))
+                        and m not in ["default", "read", "write", "with_traceback", "continue_propagation",
+                                      "stop_propagation"]
+                    ):
+                        d.bound_methods.append(Entry(Result.BoundMethod, f"{a}.{m}", getattr(c, m).__qualname__))
+        except TypeError:
+            pass
+
+    for i in filter(lambda x: not x.startswith("_"), dir(raw_methods)):
+        if i[0].isupper():
+            d.raw_methods.append(Entry(Result.RawMethod, i, id=getattr(raw_methods, i).ID, layer=layer))
+        else:
+            if "Int" not in dir(getattr(raw_methods, i)):
+                for j in filter(lambda x: not x.startswith("_") and x[0].isupper(), dir(getattr(raw_methods, i))):
+                    d.raw_methods.append(
+                        Entry(Result.RawMethod, f"{i}.{j}", id=getattr(getattr(raw_methods, i), j).ID, layer=layer)
+                    )
+
+    for i in d.raw_methods[:]:
+        if "." not in i.name:
+            d.raw_methods.remove(i)
+            d.raw_methods.append(i)
+
+    for i in filter(lambda x: not x.startswith("_"), dir(raw_types)):
+        if i[0].isupper():
+            d.raw_types.append(Entry(Result.RawType, i, id=getattr(raw_types, i).ID, layer=layer))
+        else:
+            if "Int" not in dir(getattr(raw_types, i)):
+                for j in filter(lambda x: not x.startswith("_") and x[0].isupper(), dir(getattr(raw_types, i))):
+                    d.raw_types.append(
+                        Entry(Result.RawType, f"{i}.{j}", id=getattr(getattr(raw_types, i), j).ID, layer=layer)
+                    )
+
+    for i in d.raw_types[:]:
+        if "." not in i.name:
+            d.raw_types.remove(i)
+            d.raw_types.append(i)
+
+    # Inline search indexes, the Pyrogram API one and the Telegram Raw API one.
+    # Priors rank the categories, so that methods come before the many bound methods sharing the same words.
+    # Only the names people type the most are looked up again with typos, when nothing else matches.
+    for prior, fuzzy, root, entries in (
+        (10, True, Client, d.methods),
+        (8, True, types, d.types),
+        (0, False, types, d.bound_methods),
+        (4, False, Client, d.decorators),
+        (4, False, None, d.filters)
+    ):
+        for i in entries:
+            d.index.add(i.name, i, prior, fuzzy, root and resolve(root, i.name).__doc__)
+
+    for prior, fuzzy, entries in ((2, True, d.raw_methods), (0, True, d.raw_types)):
+        for i in entries:
+            d.raw_index.add(i.name, i, prior, fuzzy)
+
+    d.index.freeze()
+    d.raw_index.freeze()
+
+    for i in d.raw_methods:
+        returns = RETURNS.search(resolve(raw_methods, i.name).__doc__ or "")
+
+        if returns:
+            d.returns.setdefault((returns["type"] or "Bool").lower(), []).append(i)
+
+    d.identify()
+
+    return d
+
+
+def load() -> Docs:
+    """Docs of the installed Pyrogram, mapped from their snapshot.
+
+    The snapshot is keyed by Pyrogram version and schema layer: when there's none yet for the installed ones, docs are
+    built from scratch and snapshotted for the next start.
+    """
+    path = snapshot.path(SNAPSHOTS, __version__, layer)
+    loaded = snapshot.load(path, (__version__, layer))
+
+    if loaded:
+        return Docs.restore(__version__, layer, *loaded)
+
+    d = build()
 
     try:
-        if not a.startswith("_") and a[0].islower() and m.__doc__ and not a.startswith("on_"):
-            METHODS.append((a.lower(), Result.Method(m)))
-    except AttributeError:
-        pass
+        snapshot.dump(path, (__version__, layer), *d.state())
+    except OSError as e:
+        log.warning("Docs snapshot not saved: %s", e)
+
+    return d
+
+
+def load_versions(current: Docs) -> dict:
+    """Docs of every Pyrogram version snapshotted so far, by version, the current docs included.
+
+    Entries equal to the ones of a version already loaded are shared with it, and search indexes of versions other
+    than the current one are only mapped when searched.
+    """
+    versions = {current.version: current}
+    records = current.records()
+
+    for version, snapshot_layer, path in snapshot.stored(SNAPSHOTS):
+        if version in versions:
+            continue
+
+        loaded = snapshot.load(path, (version, snapshot_layer))
+
+        if not loaded:
+            log.warning("Docs snapshot of Pyrogram v%s not loaded", version)
+            continue
 
-DECORATORS = []
+        versions[version] = Docs.restore(version, snapshot_layer, *loaded, records=records, source=path)
 
-for a in dir(Client):
-    m = getattr(Client, a)
+    return versions
+
+
+@lru_cache(maxsize=INDEXES)
+def remap(d: Docs) -> tuple:
+    """Search indexes of docs restored without them, mapped again from their snapshot.
+
+    Only the most recently searched ones are kept around.
+    """
+    loaded = snapshot.load(d.source, (d.version, d.layer))
+
+    if not loaded:
+        log.warning("Docs snapshot of Pyrogram v%s gone, not searchable anymore", d.version)
+        index, raw_index = Index(), Index()
+        index.freeze()
+        raw_index.freeze()
+
+        return index, raw_index
+
+    return d.map(*loaded)
+
+
+def release(version: str):
+    """Latest docs loaded of a version, e.g. "1.2" for 1.2.x, or None when there's none."""
+    found = [v for v in VERSIONS if v == version or v.startswith(version + ".")]
+
+    if not found:
+        return None
+
+    return VERSIONS[max(found, key=lambda v: [int(n) for n in re.findall(r"\d+", v)])]
+
+
+# Docs of the installed Pyrogram, None until warmed up
+DOCS = None
+
+# Docs of all the Pyrogram versions snapshotted, by version
+VERSIONS = {}
+
+# Caches of anything derived from the docs, by name, cleared whenever new docs are published
+CACHES = {}
+
+# Resident size right before and after the docs were loaded
+RSS_BEFORE = None
+RSS_AFTER = None
+
+
+async def warm_up():
+    """Load the docs in a worker thread, handlers keep being served meanwhile."""
+    global RSS_BEFORE, RSS_AFTER
+
+    RSS_BEFORE = memory.rss()
+
+    loop = asyncio.get_event_loop()
 
     try:
-        if not a.startswith("_") and a[0].islower() and m.__doc__ and a.startswith("on_"):
-            DECORATORS.append((a.lower(), Result.Decorator(m)))
-    except AttributeError:
-        pass
+        d = await loop.run_in_executor(None, load)
+        publish(d, await loop.run_in_executor(None, load_versions, d))
+    except Exception:
+        log.exception("Docs not loaded")
+        return
 
-TYPES = []
+    RSS_AFTER = memory.rss()
 
-for a in dir(types):
-    t = getattr(types, a)
 
-    if not a.startswith("_") and a[0].isupper() and t.__doc__:
-        TYPES.append((a, Result.Type(t)))
+async def reload() -> Docs:
+    """Rebuild the docs of the Pyrogram installed right now and publish them in place of the current ones.
 
-FILTERS = [
-    (i.lower(), Result.Filter(getattr(filters, i)))
-    for i in filter(
-        lambda x: not x.startswith("_")
-                  and x[0].islower(),
-        dir(filters)
+    Docs are built and snapshotted by a separate process, this one only maps the snapshot back: the Pyrogram imported
+    here stays the one the bot started with, and queries keep being answered from the previous docs meanwhile.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "assistant.utils.docs",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
     )
-]
 
-BOUND_METHODS = []
+    out, err = await process.communicate()
+
+    if process.returncode:
+        raise RuntimeError(err.decode().strip().split("\n")[-1])
+
+    version, snapshot_layer = out.decode().split()
+    d, versions = await asyncio.get_event_loop().run_in_executor(None, reopen, version, int(snapshot_layer))
+
+    publish(d, versions)
+
+    return d
+
+
+def reopen(version: str, snapshot_layer: int) -> tuple:
+    """Docs mapped from the snapshot of the given version, and the docs of all the other versions next to them."""
+    loaded = snapshot.load(snapshot.path(SNAPSHOTS, version, snapshot_layer), (version, snapshot_layer))
+
+    if not loaded:
+        raise RuntimeError(f"Docs snapshot of Pyrogram v{version} not found")
+
+    d = Docs.restore(version, snapshot_layer, *loaded)
+
+    return d, load_versions(d)
+
+
+def publish(d: Docs, versions: dict = None):
+    """Make the given docs the ones answered from, dropping everything cached from the previous ones.
+
+    Docs of other versions are kept unless given anew.
+    """
+    global DOCS, VERSIONS
+
+    DOCS = d
+    VERSIONS = {**VERSIONS, d.version: d} if versions is None else versions
+    article.cache_clear()
+    remap.cache_clear()
+
+    for c in CACHES.values():
+        c.clear()
 
-for a in dir(types):
-    try:
-        c = getattr(types, a)
-        if issubclass(c, Object):
-            for m in dir(c):
-                if (
-                    not m.startswith("_")
-                    and callable(getattr(c, m))
-                    and m not in ["default", "read", "write", "with_traceback", "continue_propagation",
-                                  "stop_propagation"]
-                ):
-                    BOUND_METHODS.append((f"{a}.{m}", Result.BoundMethod(getattr(c, m))))
-    except TypeError:
-        pass
-
-RAW_METHODS = []
-
-for i in filter(lambda x: not x.startswith("_"), dir(raw_methods)):
-    if i[0].isupper():
-        RAW_METHODS.append((i, Result.RawMethod((i, getattr(raw_methods, i)))))
-    else:
-        if "Int" not in dir(getattr(raw_methods, i)):
-            for j in filter(lambda x: not x.startswith("_") and x[0].isupper(), dir(getattr(raw_methods, i))):
-                RAW_METHODS.append((f"{i}.{j}", Result.RawMethod((f"{i}.{j}", getattr(getattr(raw_methods, i), j)))))
-
-for i in RAW_METHODS[:]:
-    if "." not in i[0]:
-        RAW_METHODS.remove(i)
-        RAW_METHODS.append(i)
-
-RAW_TYPES = []
-
-for i in filter(lambda x: not x.startswith("_"), dir(raw_types)):
-    if i[0].isupper():
-        RAW_TYPES.append((i, Result.RawType((i, getattr(raw_types, i)))))
-    else:
-        if "Int" not in dir(getattr(raw_types, i)):
-            for j in filter(lambda x: not x.startswith("_") and x[0].isupper(), dir(getattr(raw_types, i))):
-                RAW_TYPES.append((f"{i}.{j}", Result.RawType((f"{i}.{j}", getattr(getattr(raw_types, i), j)))))
-
-for i in RAW_TYPES[:]:
-    if "." not in i[0]:
-        RAW_TYPES.remove(i)
-        RAW_TYPES.append(i)
 
 FIRE_THUMB = "https://i.imgur.com/qhYYqZa.png"
 ROCKET_THUMB = "https://i.imgur.com/PDaYHd8.png"
@@ -282,7 +657,10 @@ HELP = (
 
     f"**__Search__**\n"
     f"`@pyrogrambot <terms>` – Pyrogram API\n"
-    f"`@pyrogrambot !r <terms>` – Telegram Raw API\n\n"
+    f"`@pyrogrambot !r <terms>` – Telegram Raw API\n"
+    f"`@pyrogrambot !r 0x<id>` – Raw API by constructor ID\n"
+    f"`@pyrogrambot !rr <type>` – Raw Methods returning a type\n"
+    f"`@pyrogrambot v<version> <query>` – Search or list the docs of another Pyrogram version\n\n"
 
     f"**__List__**\n"
     f"`@pyrogrambot !m` – Methods\n"
@@ -385,3 +763,14 @@ RULES = [
     )
     for i, rule in enumerate(rules.split("\n")[3:-3])
 ]
+
+
+def main():
+    """Build and snapshot the docs of the installed Pyrogram, then print the version and layer they're for."""
+    d = build()
+    snapshot.dump(snapshot.path(SNAPSHOTS, d.version, d.layer), (d.version, d.layer), *d.state())
+    print(d.version, d.layer)
+
+
+if __name__ == "__main__":
+    main()
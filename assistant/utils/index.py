@@ -0,0 +1,462 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import heapq
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+GRAM = 3
+
+EMPTY = array("I")
+
+# Words too common in docstrings to tell entries apart
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "how", "i", "if", "in", "is", "it", "of",
+    "on", "or", "that", "the", "this", "to", "was", "with", "you", "your"
+}
+
+
+def words(name: str) -> list:
+    """Split a name into its lowercase words: dotted parts, snake_case parts and CamelCase humps."""
+    name = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name).lower()
+
+    return [w for w in re.split(r"[._\s]+", name) if w]
+
+
+def ids(postings) -> np.ndarray:
+    """A posting list as an array of entry ids, sharing its memory."""
+    return np.frombuffer(postings, np.uint32)
+
+
+def grams(key: str) -> set:
+    """All the distinct substrings of a key up to GRAM characters long."""
+    return {
+        key[i: i + n]
+        for n in range(1, GRAM + 1)
+        for i in range(len(key) - n + 1)
+    }
+
+
+def distance(a: str, b: str, bound: int) -> int:
+    """Edit distance between two strings, counting adjacent transpositions as a single edit.
+
+    Gives up as soon as the distance is known to exceed the bound and returns bound + 1 instead.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+
+    before = None
+    row = list(range(len(b) + 1))
+
+    for i, ca in enumerate(a, 1):
+        above, row = row, [i] + [0] * len(b)
+
+        for j, cb in enumerate(b, 1):
+            row[j] = min(above[j] + 1, row[j - 1] + 1, above[j - 1] + (ca != cb))
+
+            if j > 1 and before and ca == b[j - 2] and a[i - 2] == cb:
+                row[j] = min(row[j], before[j - 2] + 1)
+
+        if min(row) > bound:
+            return bound + 1
+
+        before = above
+
+    return row[-1]
+
+
+class Postings:
+    """Frozen posting lists, packed one after the other in a single flat array of entry ids.
+
+    Each key maps to the offset and the length of its list, both packed in a single int. The flat array can just as
+    well be a memoryview over a mapped file.
+    """
+
+    def __init__(self, refs: dict, flat):
+        self.refs = refs
+        self.flat = flat
+
+    @classmethod
+    def pack(cls, lists: dict) -> "Postings":
+        refs = {}
+        flat = array("I")
+
+        for key, ids in lists.items():
+            refs[key] = len(flat) << 32 | len(ids)
+            flat.extend(ids)
+
+        return cls(refs, flat)
+
+    def __len__(self):
+        return len(self.refs)
+
+    def __iter__(self):
+        return iter(self.refs)
+
+    def __contains__(self, key):
+        return key in self.refs
+
+    def __getitem__(self, key):
+        ref = self.refs[key]
+        start = ref >> 32
+
+        return self.flat[start: start + (ref & 0xFFFFFFFF)]
+
+    def get(self, key, default=None):
+        return self[key] if key in self.refs else default
+
+
+class Text:
+    """Full-text index over docstrings.
+
+    Every distinct word is interned once into the vocabulary, and its postings are an array of the ids of the entries
+    mentioning it. Query words match any vocabulary word they are a prefix of ("upload" also finds "uploads" and
+    "uploading"), and all of them must be found in a docstring.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.sorted = None
+
+    def add(self, i: int, doc: str):
+        for word in set(words(re.sub(r"\W+", " ", doc))) - STOP_WORDS:
+            self.postings.setdefault(sys.intern(word), array("I")).append(i)
+
+        self.sorted = None
+
+    def freeze(self):
+        self.postings = Postings.pack(self.postings)
+
+    def lookup(self, word: str) -> set:
+        """Ids of the entries mentioning any word starting with the given one."""
+        if self.sorted is None:
+            self.sorted = sorted(self.postings)
+
+        ids = set()
+        start = bisect_left(self.sorted, word)
+
+        for w in self.sorted[start:]:
+            if not w.startswith(word):
+                break
+
+            ids.update(self.postings[w])
+
+        return ids
+
+    def match(self, query: str) -> set:
+        """Ids of the entries whose docstring mentions every word of the query."""
+        ids = None
+
+        for word in sorted(set(words(query)) - STOP_WORDS, key=len, reverse=True):
+            found = self.lookup(word)
+            ids = found if ids is None else ids & found
+
+            if not ids:
+                break
+
+        return ids or set()
+
+
+class Index:
+    """Inverted index over docs entry names, by n-grams and initials of their words, ranked with NumPy.
+
+    Falls back to a typo tolerant lookup among the fuzzy entries, and then to the docstrings.
+    """
+
+    # Term weights, from the best fit down to a plain substring match
+    EXACT = 100  # "send_message" -> send_message
+    TAIL = 80  # "reply" -> Message.reply
+    ACRONYM = 60  # "gcm" -> get_chat_member
+    PREFIX = 50  # "send" -> send_message
+    TAIL_PREFIX = 40  # "reply" -> Message.reply_text
+    BOUNDARY = 20  # "message" -> send_message
+
+    FUZZY_MIN_LEN = 5  # Shorter queries match too many names by mistake
+    FUZZY_LONG_LEN = 8  # Longer queries can have two typos instead of one
+
+    def __init__(self):
+        self.entries = []
+        self.keys = []
+        self.starts = []
+        self.tails = array("H")
+        self.priors = array("b")
+        self.fuzzy = bytearray()
+        self.grams = {}
+        self.acronyms = {}
+        self.text = Text()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, name: str, entry, prior: int = 0, fuzzy: bool = False, doc: str = None):
+        i = len(self.entries)
+        parts = [words(p) for p in name.split(".")]
+        key = "".join(w for p in parts for w in p)
+
+        starts = []
+        offset = 0
+
+        for w in (w for p in parts for w in p):
+            starts.append(offset)
+            offset += len(w)
+
+        self.entries.append(entry)
+        self.keys.append(key)
+        self.starts.append(tuple(starts))
+        self.tails.append(len(key) - sum(map(len, parts[-1])))
+        self.priors.append(prior)
+        self.fuzzy.append(fuzzy)
+
+        for g in grams(key):
+            self.grams.setdefault(g, array("I")).append(i)
+
+        for a in self.initials(i):
+            self.acronyms.setdefault(a, array("I")).append(i)
+
+        if doc:
+            self.text.add(i, doc)
+
+    def freeze(self):
+        """Pack all the postings, once every entry has been added. Nothing else can be added afterwards."""
+        self.grams = Postings.pack(self.grams)
+        self.acronyms = Postings.pack(self.acronyms)
+        self.text.freeze()
+        self.vectorize()
+
+    def state(self) -> tuple:
+        """Plain data a frozen index can be restored from, along with its flat postings. Entries are left out."""
+        state = {
+            "keys": self.keys,
+            "starts": self.starts,
+            "tails": self.tails.tobytes(),
+            "priors": self.priors.tobytes(),
+            "fuzzy": bytes(self.fuzzy),
+            "grams": self.grams.refs,
+            "acronyms": self.acronyms.refs,
+            "text": self.text.postings.refs
+        }
+
+        return state, [self.grams.flat, self.acronyms.flat, self.text.postings.flat]
+
+    @classmethod
+    def restore(cls, entries: list, state: dict, flats: list) -> "Index":
+        index = cls()
+        grams, acronyms, text = flats
+
+        index.entries = entries
+        index.keys = [sys.intern(k) for k in state["keys"]]
+        index.starts = state["starts"]
+        index.tails.frombytes(state["tails"])
+        index.priors.frombytes(state["priors"])
+        index.fuzzy = bytearray(state["fuzzy"])
+        index.grams = Postings(state["grams"], grams)
+        index.acronyms = Postings(state["acronyms"], acronyms)
+        index.text.postings = Postings(state["text"], text)
+        index.vectorize()
+
+        return index
+
+    def initials(self, i: int) -> set:
+        """Acronyms of an entry name: the initials of all its words and of the words after the last dot."""
+        key = self.keys[i]
+        starts = self.starts[i]
+        tail = self.tails[i]
+
+        acronyms = {
+            "".join(key[s] for s in starts),
+            "".join(key[s] for s in starts if s >= tail)
+        }
+
+        return {a for a in acronyms if len(a) > 1}
+
+    def vectorize(self):
+        """Lay the keys out as fixed-width arrays, so that candidates are filtered and scored all at once.
+
+        Keys are rows of a zero padded byte matrix, and the offsets their words start at are bits of a 64-bit mask
+        (the longest names have less than 64 characters).
+        """
+        width = max(map(len, self.keys), default=0) or 1
+        padded = b"".join(k.encode("ascii", "replace").ljust(width, b"\0") for k in self.keys)
+
+        self.chars = np.frombuffer(padded, np.uint8).reshape(-1, width)
+        self.lengths = np.fromiter(map(len, self.keys), np.uint8, len(self.keys))
+        self.bounds = np.array([sum(1 << s for s in starts if s < 64) for starts in self.starts], np.uint64)
+        self.tail_at = np.frombuffer(self.tails, np.uint16).astype(np.intp)
+        self.prior = np.frombuffer(self.priors, np.int8).astype(np.int32)
+        self.fuzzy_mask = np.frombuffer(self.fuzzy, np.bool_)
+
+    def find(self, ids: np.ndarray, term: str) -> np.ndarray:
+        """Where the term occurs in the keys of the given entries: a row of flags per entry, a column per offset."""
+        spans = self.chars.shape[1] - len(term) + 1
+
+        if spans <= 0 or any(ord(c) > 127 for c in term):
+            return np.zeros((len(ids), 1), np.bool_)
+
+        chars = self.chars[ids]
+        at = chars[:, :spans] == ord(term[0])
+
+        for i in range(1, len(term)):
+            at &= chars[:, i: i + spans] == ord(term[i])
+
+        return at
+
+    def lookup(self, term: str) -> np.ndarray:
+        """Ids of the entries whose key contains the term, in insertion order."""
+        if len(term) <= GRAM:
+            return ids(self.grams.get(term, EMPTY))
+
+        postings = ids(min(
+            (self.grams.get(term[i: i + GRAM], EMPTY) for i in range(len(term) - GRAM + 1)),
+            key=len
+        ))
+
+        return postings[self.find(postings, term).any(axis=1)]
+
+    @staticmethod
+    def terms(query: str) -> list:
+        """Query terms keyed the same way as names, longest first."""
+        terms = ("".join(words(t)) for t in query.split())
+
+        return sorted(filter(None, terms), key=len, reverse=True)
+
+    def match(self, query: str) -> np.ndarray:
+        """Ids of the entries matching every space separated term of the query, in insertion order."""
+        terms = self.terms(query)
+
+        if not terms:
+            return ids(EMPTY)
+
+        # The longest term is usually the most selective one, the others just filter its matches
+        found = self.lookup(terms[0])
+
+        for term in terms[1:]:
+            found = found[self.find(found, term).any(axis=1)]
+
+        if len(terms) == 1 and terms[0] in self.acronyms:
+            found = np.union1d(found, ids(self.acronyms[terms[0]]))
+
+        return found
+
+    def score(self, found: np.ndarray, terms: list) -> np.ndarray:
+        """Scores of the given entries: their prior plus, for each term, the weight of the best way it fits."""
+        scores = self.prior[found]
+        lengths = self.lengths[found]
+        tails = self.tail_at[found]
+        bounds = self.bounds[found]
+        rows = np.arange(len(found))
+
+        for term in terms:
+            at = self.find(found, term)
+            spans = at.shape[1]
+
+            prefix = at[:, 0]
+            tail_prefix = (tails > 0) & (tails < spans) & at[rows, np.minimum(tails, spans - 1)]
+            starts = (bounds[:, None] >> np.arange(min(spans, 64), dtype=np.uint64)) & np.uint64(1)
+            boundary = (at[:, :64] & starts.astype(np.bool_)).any(axis=1)
+
+            if term in self.acronyms:
+                acronym = np.isin(found, ids(self.acronyms[term]))
+            else:
+                acronym = np.zeros(len(found), np.bool_)
+
+            scores = scores + np.select(
+                [
+                    prefix & (lengths == len(term)),
+                    tail_prefix & (lengths - tails == len(term)),
+                    acronym,
+                    prefix,
+                    tail_prefix,
+                    boundary
+                ],
+                [Index.EXACT, Index.TAIL, Index.ACRONYM, Index.PREFIX, Index.TAIL_PREFIX, Index.BOUNDARY],
+                0
+            )
+
+        return scores
+
+    def rank(self, query: str, found: np.ndarray, limit: int = None) -> list:
+        """The best entries among the matched ids, best first, or all of them when there's no limit.
+
+        Ties go to the shortest name first and then to the insertion order.
+        """
+        scores = self.score(found, self.terms(query))
+        best = found[np.lexsort((found, self.lengths[found], -scores))[:limit]]
+
+        return [self.entries[i] for i in best]
+
+    def near(self, query: str, limit: int = None) -> tuple:
+        """Count of the fuzzy entries within a few typos of the query, and the closest of them."""
+        term = "".join(self.terms(query))
+
+        if len(term) < Index.FUZZY_MIN_LEN:
+            return 0, []
+
+        bound = 1 if len(term) < Index.FUZZY_LONG_LEN else 2
+        bigrams = {term[i: i + 2] for i in range(len(term) - 1)}
+
+        # Each edit can remove at most two of the query bigrams from a name, three for a transposition
+        shared = np.bincount(
+            np.concatenate([ids(self.grams.get(g, EMPTY)) for g in bigrams]),
+            minlength=len(self.keys)
+        )
+
+        threshold = len(bigrams) - 3 * bound
+        found = []
+
+        for i in np.flatnonzero((shared >= threshold) & self.fuzzy_mask).tolist():
+            d = distance(term, self.keys[i], bound)
+
+            if d <= bound:
+                found.append((d, -self.priors[i], len(self.keys[i]), i))
+
+        best = heapq.nsmallest(len(found) if limit is None else limit, found)
+
+        return len(found), [self.entries[i[-1]] for i in best]
+
+    def describe(self, query: str, limit: int = None) -> tuple:
+        """Count of the entries whose docstring matches the query, and the best of them by category."""
+        found = np.fromiter(self.text.match(query), np.intp)
+        best = found[np.lexsort((found, self.lengths[found], -self.prior[found]))[:limit]]
+
+        return len(found), [self.entries[i] for i in best]
+
+    def search(self, query: str, limit: int = None) -> tuple:
+        """Count of all the entries matching the query, and the best of them (all of them, ranked, with no limit).
+
+        Falls back to a typo tolerant lookup when no name matches, and then to the docstrings.
+        """
+        found = self.match(query)
+
+        if len(found):
+            return len(found), self.rank(query, found, limit)
+
+        count, best = self.near(query, limit)
+
+        if count:
+            return count, best
+
+        return self.describe(query, limit)
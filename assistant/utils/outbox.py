@@ -0,0 +1,175 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from pyrogram.errors import FloodWait
+
+from .futures import fail
+
+log = logging.getLogger(__name__)
+
+
+class Bucket:
+    """Token bucket: a token every 1 / rate seconds, up to burst tokens saved."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def wait(self, now: float) -> float:
+        """Seconds until a token is available, 0 if there's one already."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Job:
+    __slots__ = ("func", "args", "kwargs", "future")
+
+    def __init__(self, func, args: tuple, kwargs: dict, future: asyncio.Future):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+
+
+class Outbox:
+    """Outgoing messages, queued by chat and priority and sent within the rate limits of each chat and of the bot.
+
+    Submitting returns a future of the result. A chat getting a flood wait is paused, the others keep flowing.
+    """
+
+    # Priorities, from the first served
+    MODERATION = 0
+    REPLY = 1
+
+    CHAT_RATE = 20 / 60  # Telegram allows about 20 messages per minute in groups
+    CHAT_BURST = 5
+    GLOBAL_RATE = 30  # And about 30 messages per second overall
+    GLOBAL_BURST = 30
+
+    def __init__(self):
+        self.queues = {}  # Chat id -> a deque of jobs per priority
+        self.buckets = {}
+        self.overall = Bucket(Outbox.GLOBAL_RATE, Outbox.GLOBAL_BURST)
+        self.busy = set()
+        self.paused = {}  # Chat id -> monotonic time its flood wait ends at
+        self.wake = None
+        self.runner = None
+
+        self.sent = 0
+        self.floods = 0
+
+    def submit(self, chat_id: int, priority: int, func, *args, **kwargs) -> asyncio.Future:
+        """Queue a send, func(*args, **kwargs), to the given chat. Returns the future of its result."""
+        if self.runner is None:
+            self.wake = asyncio.Event()
+            self.runner = asyncio.ensure_future(self.run())
+
+        future = asyncio.get_event_loop().create_future()
+        queues = self.queues.setdefault(chat_id, (deque(), deque()))
+        queues[priority].append(Job(func, args, kwargs, future))
+        self.wake.set()
+
+        return future
+
+    def pending(self) -> int:
+        return sum(len(q) for queues in self.queues.values() for q in queues)
+
+    async def run(self):
+        while True:
+            self.wake.clear()
+            delay = self.dispatch()
+
+            try:
+                await asyncio.wait_for(self.wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def dispatch(self):
+        """Hand out every send allowed right now. Returns the seconds until the next one could be, if any is left."""
+        now = time.monotonic()
+        delay = None
+
+        for priority in (Outbox.MODERATION, Outbox.REPLY):
+            for chat_id, queues in list(self.queues.items()):
+                queue = queues[priority]
+
+                if not queue or chat_id in self.busy:
+                    continue
+
+                bucket = self.buckets.get(chat_id)
+
+                if bucket is None:
+                    bucket = self.buckets[chat_id] = Bucket(Outbox.CHAT_RATE, Outbox.CHAT_BURST)
+
+                wait = max(self.paused.get(chat_id, 0) - now, bucket.wait(now), self.overall.wait(now))
+
+                if wait > 0:
+                    delay = wait if delay is None else min(delay, wait)
+                    continue
+
+                bucket.take()
+                self.overall.take()
+                self.busy.add(chat_id)
+                asyncio.ensure_future(self.send(chat_id, queue, queue.popleft()))
+
+        return delay
+
+    async def send(self, chat_id: int, queue: deque, job: Job):
+        try:
+            result = await job.func(*job.args, **job.kwargs)
+        except FloodWait as e:
+            log.warning("Outbox: flood wait of %s s in %s", e.x, chat_id)
+            self.floods += 1
+            self.paused[chat_id] = time.monotonic() + e.x
+            queue.appendleft(job)
+        except Exception as e:
+            # Most senders don't wait for the outcome, failures are logged here instead of getting lost
+            log.warning("Outbox: send to %s failed: %s", chat_id, e)
+
+            if not job.future.cancelled():
+                fail(job.future, e)
+        else:
+            self.sent += 1
+
+            if not job.future.cancelled():
+                job.future.set_result(result)
+        finally:
+            self.busy.discard(chat_id)
+
+            if not any(self.queues[chat_id]):
+                del self.queues[chat_id]
+
+            self.wake.set()
@@ -0,0 +1,112 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+import logging
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+
+from .deletions import BATCH
+
+log = logging.getLogger(__name__)
+
+CHUNK = 200  # Message ids fetched at once while walking back through the history
+AHEAD = 2  # Chunks fetched ahead of the deletions
+
+
+async def patiently(func, *args, **kwargs):
+    """Call an API method, waiting out any flood wait it gets and trying again."""
+    while True:
+        try:
+            return await func(*args, **kwargs)
+        except FloodWait as e:
+            log.warning("Purge: flood wait of %s s", e.x)
+            await asyncio.sleep(e.x)
+
+
+async def delete(client: Client, chat_id: int, message_ids: list) -> int:
+    """Delete messages in the largest batches allowed. Returns how many were deleted."""
+    for i in range(0, len(message_ids), BATCH):
+        await patiently(client.delete_messages, chat_id, message_ids[i: i + BATCH])
+
+    return len(message_ids)
+
+
+async def purge(
+    client: Client, chat_id: int, start: int, user_id: int, limit: int, since: int, scan: int, progress=None
+) -> tuple:
+    """Delete the latest messages of a user in a chat, walking the history back from the given message id.
+
+    Returns the count of messages deleted and ids scanned. Progress, if any, is awaited with the same after each chunk.
+    """
+    chunks = asyncio.Queue(maxsize=AHEAD)
+
+    async def walk():
+        # The walk always ends with a None, or with the error that stopped it, so the deletions never wait in vain
+        try:
+            for top in range(start, max(start - scan, 0), -CHUNK):
+                ids = range(top, max(top - CHUNK, 0), -1)
+                messages = [m for m in await patiently(client.get_messages, chat_id, ids, replies=0) if not m.empty]
+
+                await chunks.put((
+                    [m.message_id for m in messages if m.from_user and m.from_user.id == user_id and m.date >= since],
+                    len(ids)
+                ))
+
+                # Ids only grow with time, everything further back is older still
+                if messages and messages[0].date < since:
+                    break
+        except Exception as e:
+            await chunks.put(e)
+        else:
+            await chunks.put(None)
+
+    walker = asyncio.ensure_future(walk())
+    found = []
+    deleted = scanned = 0
+
+    try:
+        while deleted + len(found) < limit:
+            chunk = await chunks.get()
+
+            if chunk is None:
+                break
+
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            found += chunk[0][:limit - deleted - len(found)]
+            scanned += chunk[1]
+
+            while len(found) >= BATCH:
+                deleted += await delete(client, chat_id, found[:BATCH])
+                del found[:BATCH]
+
+            if progress:
+                await progress(deleted, scanned)
+
+        deleted += await delete(client, chat_id, found)
+    finally:
+        walker.cancel()
+
+    return deleted, scanned
@@ -0,0 +1,127 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import time
+from array import array
+from collections import deque
+
+
+class Ring:
+    """The latest messages of a chat, as parallel arrays of message ids, user ids and dates used as a ring.
+
+    Positions count every message ever added: the one at position p sits at p % size, until overwritten by the one at
+    p + size. Each user maps to the positions of their messages still in the ring, oldest first.
+    """
+
+    __slots__ = ("size", "ids", "users", "dates", "count", "positions", "since")
+
+    def __init__(self, size: int, since: int):
+        self.size = size
+        self.ids = array("q", bytes(8 * size))
+        self.users = array("q", bytes(8 * size))
+        self.dates = array("q", bytes(8 * size))
+        self.count = 0
+        self.positions = {}
+        # Date from which every message of the chat is in the ring
+        self.since = since
+
+    def add(self, message_id: int, user_id: int, date: int):
+        slot = self.count % self.size
+
+        if self.count >= self.size:
+            # The oldest position of a user is always the first to be overwritten
+            old = self.users[slot]
+            positions = self.positions[old]
+            positions.popleft()
+
+            if not positions:
+                del self.positions[old]
+
+            self.since = max(self.since, self.dates[slot] + 1)
+
+        self.ids[slot] = message_id
+        self.users[slot] = user_id
+        self.dates[slot] = date
+        self.positions.setdefault(user_id, deque()).append(self.count)
+        self.count += 1
+
+    def find(self, user_id: int, before: int, limit: int, since: int) -> tuple:
+        """Latest message ids of a user, up to the given id and back to the since date, newest first.
+
+        Also tells whether they're all of them, or older messages of the user could be missing from the ring.
+        """
+        found = []
+
+        for p in reversed(self.positions.get(user_id, ())):
+            slot = p % self.size
+            message_id = self.ids[slot]
+
+            if self.dates[slot] < since or len(found) == limit:
+                break
+
+            if message_id and message_id <= before:
+                found.append(message_id)
+
+        return found, len(found) == limit or self.since <= since
+
+    def forget(self, user_id: int, message_ids: list):
+        """Leave out messages known to be gone."""
+        message_ids = set(message_ids)
+
+        for p in self.positions.get(user_id, ()):
+            slot = p % self.size
+
+            if self.ids[slot] in message_ids:
+                self.ids[slot] = 0
+
+
+class Recent:
+    """Rings of the latest messages of each chat the assistant moderates.
+
+    Moderation commands find the messages of a user here, instead of fetching the chat history back from the API.
+    """
+
+    SIZE = 4096  # Messages kept per chat
+
+    def __init__(self, chats: list, size: int = SIZE):
+        start = int(time.time())
+        self.rings = {chat: Ring(size, start) for chat in chats}
+
+    def add(self, chat_id: int, message_id: int, user_id: int, date: int):
+        ring = self.rings.get(chat_id)
+
+        if ring is not None:
+            ring.add(message_id, user_id, date)
+
+    def find(self, chat_id: int, user_id: int, before: int, limit: int, since: int) -> tuple:
+        ring = self.rings.get(chat_id)
+
+        if ring is None:
+            return [], False
+
+        return ring.find(user_id, before, limit, since)
+
+    def forget(self, chat_id: int, user_id: int, message_ids: list):
+        ring = self.rings.get(chat_id)
+
+        if ring is not None:
+            ring.forget(user_id, message_ids)
@@ -0,0 +1,151 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+from pyrogram import Client
+
+log = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Delayed actions in a timer wheel of one-second ticks, stored in a SQLite file until done to survive restarts.
+
+    An action is a name registered with Scheduler.action, or else of a client method, and its arguments.
+    """
+
+    ACTIONS = {}  # Name -> coroutine function of the actions registered
+
+    TICK = 1  # Seconds per tick
+    SLOTS = 64  # Ticks per turn of the wheel, actions further away wait for more turns in their slot
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = None
+        self.client = None
+        self.wheel = [{} for _ in range(Scheduler.SLOTS)]  # Slot -> action id -> (tick, name, args)
+        self.current = Scheduler.ticks(time.time())
+        self.ticker = None
+
+        self.scheduled = 0
+        self.done = 0
+        self.failures = 0
+
+    @staticmethod
+    def action(name: str):
+        """Decorator to register a coroutine function as an action with the given name.
+
+        Actions are registered when the plugins are loaded, before the stored ones are replayed.
+        """
+        def decorator(func):
+            Scheduler.ACTIONS[name] = func
+            return func
+
+        return decorator
+
+    @staticmethod
+    def ticks(t: float) -> int:
+        return int(t // Scheduler.TICK)
+
+    def start(self, client: Client) -> int:
+        """Open the store, replay the actions left in it and start ticking. Returns how many were replayed."""
+        self.client = client
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.execute("CREATE TABLE IF NOT EXISTS actions (id INTEGER PRIMARY KEY, due REAL, name TEXT, args TEXT)")
+
+        self.current = Scheduler.ticks(time.time())
+        rows = self.db.execute("SELECT id, due, name, args FROM actions").fetchall()
+
+        for action_id, due, name, args in rows:
+            self.add(action_id, due, name, json.loads(args))
+
+        self.ticker = asyncio.ensure_future(self.tick())
+
+        return len(rows)
+
+    def stop(self):
+        """Stop ticking. Actions still pending stay in the store for the next start."""
+        if self.ticker:
+            self.ticker.cancel()
+            self.ticker = None
+
+        if self.db:
+            self.db.close()
+            self.db = None
+
+    def schedule(self, delay: float, name: str, *args) -> int:
+        """Run the action with the given name and arguments in delay seconds. Returns the action id."""
+        due = time.time() + delay
+        action_id = self.db.execute(
+            "INSERT INTO actions (due, name, args) VALUES (?, ?, ?)",
+            (due, name, json.dumps(args))
+        ).lastrowid
+
+        self.scheduled += 1
+        self.add(action_id, due, name, args)
+
+        return action_id
+
+    def pending(self) -> int:
+        return sum(len(slot) for slot in self.wheel)
+
+    def add(self, action_id: int, due: float, name: str, args):
+        # Round up, an action never runs earlier than asked
+        tick = -Scheduler.ticks(-due)
+
+        if tick <= self.current:
+            asyncio.ensure_future(self.run(action_id, name, args))
+        else:
+            self.wheel[tick % Scheduler.SLOTS][action_id] = (tick, name, args)
+
+    async def tick(self):
+        while True:
+            await asyncio.sleep(Scheduler.TICK - time.time() % Scheduler.TICK)
+
+            # Catch up on every tick elapsed, in case the loop was late
+            while self.current < Scheduler.ticks(time.time()):
+                self.current += 1
+                slot = self.wheel[self.current % Scheduler.SLOTS]
+
+                for action_id in [i for i, (tick, _, _) in slot.items() if tick <= self.current]:
+                    _, name, args = slot.pop(action_id)
+                    asyncio.ensure_future(self.run(action_id, name, args))
+
+    async def run(self, action_id: int, name: str, args):
+        try:
+            if name in Scheduler.ACTIONS:
+                await Scheduler.ACTIONS[name](self.client, *args)
+            else:
+                await getattr(self.client, name)(*args)
+        except Exception as e:
+            log.warning("Scheduler: %s%s failed: %s", name, tuple(args), e)
+            self.failures += 1
+        else:
+            self.done += 1
+
+        # Failed actions are dropped as well, retrying them at every start would hardly fare any better
+        if self.db:
+            self.db.execute("DELETE FROM actions WHERE id = ?", (action_id,))
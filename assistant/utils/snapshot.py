@@ -0,0 +1,120 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import marshal
+import mmap
+import os
+import re
+import struct
+
+MAGIC = b"PYRODOCS"
+FORMAT = 2
+
+# Magic, format and size of the marshalled state following the header
+HEADER = struct.Struct("<8sII")
+
+
+# Name of a snapshot file, by Pyrogram version and schema layer
+NAME = re.compile(r"pyrogram-(?P<version>.+)-layer-(?P<layer>\d+)\.idx")
+
+
+def path(root: str, version: str, layer: int) -> str:
+    return os.path.join(root, f"pyrogram-{version}-layer-{layer}.idx")
+
+
+def stored(root: str) -> list:
+    """Version, layer and path of every snapshot found in the given directory."""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+
+    found = []
+
+    for name in sorted(names):
+        match = NAME.fullmatch(name)
+
+        if match:
+            found.append((match["version"], int(match["layer"]), os.path.join(root, name)))
+
+    return found
+
+
+def dump(path: str, key: tuple, state, segments: list):
+    """Write a snapshot: the header, the marshalled state and then every segment of 32-bit ints, 4-byte aligned.
+
+    The file is written aside and renamed over the old one, readers never see a partial snapshot.
+    """
+    payload = marshal.dumps((key, state, [len(s) for s in segments]))
+    temp = f"{path}.{os.getpid()}.tmp"
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT, len(payload)))
+        f.write(payload)
+        f.write(b"\0" * (-f.tell() % 4))
+
+        for s in segments:
+            f.write(s)
+
+    os.replace(temp, path)
+
+
+def load(path: str, key: tuple):
+    """Map a snapshot back into memory.
+
+    Returns the state and the segments, as memoryviews over the mapped file, or None in case the snapshot is missing,
+    broken or was taken for a different key.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: empty files can't be mapped
+        return None
+
+    try:
+        magic, fmt, size = HEADER.unpack_from(mapped)
+
+        if magic != MAGIC or fmt != FORMAT:
+            return None
+
+        offset = HEADER.size + size
+        snapshot_key, state, lengths = marshal.loads(mapped[HEADER.size: offset])
+
+        if snapshot_key != key:
+            return None
+
+        offset += -offset % 4
+        view = memoryview(mapped)
+        segments = []
+
+        for n in lengths:
+            if offset + n * 4 > len(mapped):
+                return None
+
+            segments.append(view[offset: offset + n * 4].cast("I"))
+            offset += n * 4
+
+        return state, segments
+    except (struct.error, ValueError, EOFError, TypeError):
+        return None
@@ -0,0 +1,192 @@
+#  MIT License
+#
+#  Copyright (c) 2019-present Dan <https://github.com/delivrance>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+"""Benchmark of the inline handler, replaying a corpus of queries against the docs snapshot.
+
+Run from the repository root with: python -m benchmarks.inline [--rounds N] [--corpus PATH]
+
+Queries go through the same handler Telegram updates do, with a fake bot and a fake inline query recording the answers
+instead of sending them. The first round runs on empty caches, the next ones on warm caches. Latencies and throughput
+are measured on their own, allocations in a further round traced by tracemalloc, which slows everything down.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from assistant.plugins.inline import inline
+from assistant.utils import docs
+
+CORPUS = os.path.join(os.path.dirname(__file__), "queries.txt")
+
+
+class User:
+    def __init__(self, id: int):
+        self.id = id
+
+
+class InlineQuery:
+    """Stands for pyrogram.types.InlineQuery, keeping what's answered through it."""
+
+    def __init__(self, id: int, query: str, offset: str):
+        self.id = str(id)
+        self.query = query
+        self.offset = offset
+        # Every query comes from a user of its own, none is held back as if still typing
+        self.from_user = User(id)
+        self.answers = []
+
+    async def answer(self, **kwargs):
+        self.answers.append(kwargs)
+        return True
+
+
+class Bot:
+    """Stands for the Assistant client, keeping the raw functions sent."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(data)
+        return True
+
+
+def corpus(path: str) -> OrderedDict:
+    """Queries and offsets of the corpus, by section."""
+    sections = OrderedDict()
+    section = sections.setdefault("all", [])
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+
+            if line.startswith("## "):
+                section = sections.setdefault(line[3:], [])
+            elif line and not line.startswith("#"):
+                query, _, offset = line.partition("\t")
+                section.append((query, offset))
+
+    return OrderedDict((k, v) for k, v in sections.items() if v)
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile of values sorted ascending."""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+async def replay(bot: Bot, queries: list, first_id: int, traced: bool = False) -> list:
+    """Latency of each query in seconds or, if traced, the bytes allocated at peak while answering it."""
+    measures = []
+
+    for i, (query, offset) in enumerate(queries):
+        q = InlineQuery(first_id + i, query, offset)
+
+        if traced:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await inline(bot, q)
+            measures.append(tracemalloc.get_traced_memory()[1] - before)
+        else:
+            start = time.perf_counter()
+            await inline(bot, q)
+            measures.append(time.perf_counter() - start)
+
+    return measures
+
+
+def report(title: str, latencies: list, elapsed: float):
+    latencies = sorted(latencies)
+
+    print(
+        f"{title:<14} {len(latencies):>6} {len(latencies) / elapsed:>10.0f} "
+        f"{percentile(latencies, 50) * 1000:>8.3f} {percentile(latencies, 95) * 1000:>8.3f} "
+        f"{percentile(latencies, 99) * 1000:>8.3f} {latencies[-1] * 1000:>8.3f}"
+    )
+
+
+async def main(rounds: int, path: str):
+    sections = corpus(path)
+    queries = [q for s in sections.values() for q in s]
+    bot = Bot()
+
+    d = docs.load()
+    docs.publish(d, docs.load_versions(d))
+
+    print(f"Pyrogram v{d.version}, Layer {d.layer}: {len(queries)} queries in {len(sections)} sections\n")
+    print(f"{'':<14} {'queries':>6} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+    # Cold round, on empty caches, one section after the other
+    docs.publish(d)
+    cold = []
+    start = time.perf_counter()
+
+    for name, section in sections.items():
+        begin = time.perf_counter()
+        latencies = await replay(bot, section, len(cold))
+        report(f"  {name}", latencies, time.perf_counter() - begin)
+        cold += latencies
+
+    report("cold", cold, time.perf_counter() - start)
+
+    # Warm rounds, the caches are kept
+    warm = []
+    start = time.perf_counter()
+
+    for r in range(rounds):
+        warm += await replay(bot, queries, (r + 1) * len(queries))
+
+    report("warm", warm, time.perf_counter() - start)
+
+    # Allocations, both cold and warm. Peaks can only be reset per query from Python 3.9
+    if not hasattr(tracemalloc, "reset_peak"):
+        print("\nAllocations not measured, they need Python 3.9 or higher")
+        return
+
+    print(f"\n{'':<14} {'KiB/query':>10} {'p95 KiB':>8} {'p99 KiB':>8} {'max KiB':>8}")
+    tracemalloc.start()
+
+    for title in ("cold", "warm"):
+        if title == "cold":
+            docs.publish(d)
+
+        peaks = sorted(await replay(bot, queries, (rounds + 1) * len(queries), traced=True))
+
+        print(
+            f"{title:<14} {sum(peaks) / len(peaks) / 1024:>10.1f} {percentile(peaks, 95) / 1024:>8.1f} "
+            f"{percentile(peaks, 99) / 1024:>8.1f} {peaks[-1] / 1024:>8.1f}"
+        )
+
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the inline handler")
+    parser.add_argument("--rounds", type=int, default=20, help="warm rounds over the whole corpus")
+    parser.add_argument("--corpus", default=CORPUS, help="file of queries to replay")
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args.rounds, args.corpus))